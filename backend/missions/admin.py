@@ -1,17 +1,29 @@
 from django.contrib import admin
 from . import models
 
-admin.site.register(models.RoverHardware)
-admin.site.register(models.Sensor)
-admin.site.register(models.Calibration)
-admin.site.register(models.Location)
-admin.site.register(models.Mission)
-admin.site.register(models.SensorDeployment)
-admin.site.register(models.NavSample)
-admin.site.register(models.LogFile)
-admin.site.register(models.MediaAsset)
-admin.site.register(models.FrameIndex)
-admin.site.register(models.ImuSample)
-admin.site.register(models.CompassSample)
-admin.site.register(models.PressureSample)
-admin.site.register(models.TideLevel)
\ No newline at end of file
+
+class MissionsModelAdmin(admin.ModelAdmin):
+    # __str__ on most models follows FKs, so join them into the changelist query.
+    # Skipping the unfiltered COUNT(*) keeps the sample tables (millions of rows) browsable.
+    list_select_related = True
+    show_full_result_count = False
+    list_per_page = 100
+
+
+for model in [
+    models.RoverHardware,
+    models.Sensor,
+    models.Calibration,
+    models.Location,
+    models.Mission,
+    models.SensorDeployment,
+    models.NavSample,
+    models.LogFile,
+    models.MediaAsset,
+    models.FrameIndex,
+    models.ImuSample,
+    models.CompassSample,
+    models.PressureSample,
+    models.TideLevel,
+]:
+    admin.site.register(model, MissionsModelAdmin)
@@ -63,11 +63,14 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Scanning directory: {camera_path}")
 
+        # data_path is canonical, so paths found under it can be made relative without resolving again
+        project_root = settings.PROJECT_DIR.resolve()
+
         # Find all session directories
-        session_dirs = sorted([
-            d for d in camera_path.iterdir() 
-            if d.is_dir() and d.name.startswith("session_")
-        ])
+        # os.scandir answers is_dir() from the directory entry, no stat() per child
+        with os.scandir(camera_path) as it:
+            session_names = sorted(e.name for e in it if e.name.startswith("session_") and e.is_dir())
+        session_dirs = [camera_path / name for name in session_names]
 
         if not session_dirs:
              raise CommandError(f"No 'session_*' directories found in {camera_path}.")
@@ -83,8 +86,8 @@ class Command(BaseCommand):
             if video_path.exists():
                 # Verify relative path for DB
                 try:
-                    rel_video_path = str(video_path.resolve().relative_to(settings.PROJECT_DIR.resolve()))
-                    rel_session_path = str(session_dir.resolve().relative_to(settings.PROJECT_DIR.resolve()))
+                    rel_video_path = str(video_path.relative_to(project_root))
+                    rel_session_path = str(session_dir.relative_to(project_root))
                 except ValueError:
                     self.stdout.write(self.style.ERROR(f"Skipping {session_dir.name}: Path outside project root"))
                     continue
@@ -103,18 +106,24 @@ class Command(BaseCommand):
         self.stdout.write(f"Found {len(updates_found)} generated videos.")
 
         # --- 3. Match with DB Assets ---
+        # Fetch every candidate Image Set in one query. We match strictly on the file_path
+        # stored in MediaAsset; file_path is not unique, so keep the first by the default
+        # ordering (start_time), as .first() did per folder.
+        assets_by_path = {}
+        candidates = MediaAsset.objects.filter(
+            file_path__in=[item['session_path'] for item in updates_found],
+            media_type=MediaAsset.MediaType.IMAGE_SET
+        ).only('id', 'file_path', 'generated_video_path')
+        for asset in candidates:
+            assets_by_path.setdefault(asset.file_path, asset)
+
         matched_updates = []
         
         for item in updates_found:
             # Look for the Image Set that corresponds to this folder
-            # We match strictly on the file_path stored in MediaAsset
-            qs = MediaAsset.objects.filter(
-                file_path=item['session_path'],
-                media_type=MediaAsset.MediaType.IMAGE_SET
-            )
+            asset = assets_by_path.get(item['session_path'])
 
-            if qs.exists():
-                asset = qs.first()
+            if asset:
                 # Check if it actually needs updating
                 if asset.generated_video_path != item['video_path']:
                     matched_updates.append((asset, item['video_path']))
@@ -144,15 +153,20 @@ class Command(BaseCommand):
                 sys.exit(0)
 
         # --- 5. Apply Updates ---
-        success_count = 0
-        with transaction.atomic():
+        if is_dry_run:
             for asset, vid_path in matched_updates:
-                if is_dry_run:
-                    self.stdout.write(f"[DRY] Would update asset {asset.id} with {vid_path}")
-                else:
-                    asset.generated_video_path = vid_path
-                    asset.save(update_fields=['generated_video_path'])
-                    success_count += 1
+                self.stdout.write(f"[DRY] Would update asset {asset.id} with {vid_path}")
+            return
+
+        for asset, vid_path in matched_updates:
+            asset.generated_video_path = vid_path
+
+        # One CASE/WHEN UPDATE per batch instead of one UPDATE per asset
+        with transaction.atomic():
+            MediaAsset.objects.bulk_update(
+                [asset for asset, _ in matched_updates],
+                ['generated_video_path'],
+                batch_size=500
+            )
 
-        if not is_dry_run:
-            self.stdout.write(self.style.SUCCESS(f"Successfully linked {success_count} videos."))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"Successfully linked {len(matched_updates)} videos."))
\ No newline at end of file
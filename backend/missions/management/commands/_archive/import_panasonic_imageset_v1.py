@@ -1,19 +1,26 @@
 import os
 import sys
+import re
 import logging
+import numpy as np
 from pathlib import Path
-from datetime import datetime, timezone
-from bisect import bisect_left
+from datetime import datetime
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.db.models import Q
 from django.db import transaction
 
-from missions.models import Mission, Sensor, SensorDeployment, MediaAsset, FrameIndex, NavSample
+from missions.models import Mission, Sensor, SensorDeployment, MediaAsset, NavSample
+from missions.management.commands._frameindex import UTC, EPOCH, ONE_US, match_nav, frame_rows, replace_frames
 
 logger = logging.getLogger(__name__)
 
+# Timestamp file rows: "image<N> <epoch_ms>"
+IMAGE_PREFIX = b'image'
+# A whole file of nothing but such rows (optional \r, optional final newline)
+TIMESTAMP_FILE_RE = re.compile(rb'(?:image\d+ \d+\r?\n)*(?:image\d+ \d+\r?)?')
+
 class Command(BaseCommand):
     help = 'Auto-detect mission, import Panasonic Image Sets, and populate FrameIndex.'
 
@@ -65,6 +72,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("!!! DRY RUN MODE: No changes will be saved !!!"))
 
         # --- 1. Path Setup ---
+        # Resolved once; session folders found under the canonical camera path are made
+        # relative to it without resolving each one again
+        self.project_root = settings.PROJECT_DIR.resolve()
         input_path = Path(data_root_str)
         if input_path.is_absolute():
             data_path = input_path.resolve()
@@ -74,16 +84,18 @@ class Command(BaseCommand):
         if not data_path.exists():
              raise CommandError(f"Data root path does not exist: {data_path}")
 
-        camera_path = data_path / camera_folder_name
+        camera_path = (data_path / camera_folder_name).resolve()
         if not camera_path.exists():
              raise CommandError(f"Expected camera folder not found: {camera_path}")
 
         self.stdout.write(f"Scanning directory: {camera_path}")
 
-        session_dirs = sorted([
-            d for d in camera_path.iterdir() 
-            if d.is_dir() and d.name.startswith("session_")
-        ])
+        # os.scandir answers is_dir() from the directory entry, no stat per child
+        with os.scandir(camera_path) as it:
+            session_dirs = sorted(
+                Path(e.path) for e in it
+                if e.name.startswith("session_") and e.is_dir()
+            )
 
         if not session_dirs:
              raise CommandError(f"No 'session_*' directories found in {camera_path}.")
@@ -98,12 +110,14 @@ class Command(BaseCommand):
             (Q(end_time__gte=sample_dt) | Q(end_time__isnull=True))
         )
 
-        if candidates.count() == 0:
+        # Two rows are enough to tell none / one / ambiguous in a single query
+        cand_list = list(candidates[:2])
+        if len(cand_list) == 0:
             raise CommandError(f"No Mission found covering the time {sample_dt}.")
-        elif candidates.count() > 1:
+        elif len(cand_list) > 1:
             raise CommandError(f"Ambiguous! Multiple missions match this time: {candidates}")
         
-        mission = candidates.first()
+        mission = cand_list[0]
 
         # --- 3. Interactive Confirmation ---
         self.stdout.write(self.style.SUCCESS("-" * 40))
@@ -123,7 +137,7 @@ class Command(BaseCommand):
         # --- 4. Load Deployment & Nav Data ---
         try:
             sensor = Sensor.objects.get(name=sensor_name)
-            deployment = SensorDeployment.objects.get(
+            deployment = SensorDeployment.objects.select_related('mission', 'sensor').get(
                 mission=mission,
                 sensor=sensor,
                 instance=instance_num
@@ -133,147 +147,161 @@ class Command(BaseCommand):
 
         # PRE-LOAD NavSamples for efficiency (used for FrameIndex matching)
         self.stdout.write("Loading NavSamples for matching...")
-        nav_samples = list(
+        # Two parallel columns (sorted epoch microseconds + ids) filled in one pass
+        # over a streamed tuple cursor, shared by every session
+        nav_ids, nav_us = [], []
+        rows = (
             NavSample.objects.filter(mission=mission)
             .order_by('timestamp')
-            .values('id', 'timestamp')
+            .values_list('id', 'timestamp')
+            .iterator(chunk_size=50000)
         )
-        self.stdout.write(f"Loaded {len(nav_samples)} NavSamples.")
+        for n_id, ts in rows:
+            nav_ids.append(n_id)
+            nav_us.append((ts - EPOCH) // ONE_US)
+        nav_ids = np.array(nav_ids, dtype=np.int64)
+        nav_us = np.array(nav_us, dtype=np.int64)
+        self.stdout.write(f"Loaded {len(nav_ids)} NavSamples.")
 
         # --- 5. Process Sessions ---
+        # One transaction for the whole import. Each session's asset is upserted under its own
+        # savepoint, so a failed session is rolled back alone and keeps its previous frames.
         processed_count = 0
-        for session_dir in session_dirs:
-            try:
-                self.process_session(session_dir, deployment, nav_samples, is_dry_run)
-                processed_count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed session {session_dir.name}: {e}"))
-                logger.error(f"Failed session {session_dir.name}", exc_info=True)
+        saved_sessions = []
+        with transaction.atomic():
+            for session_dir in session_dirs:
+                try:
+                    with transaction.atomic():
+                        saved = self.process_session(session_dir, deployment, nav_ids, nav_us, is_dry_run)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Failed session {session_dir.name}: {e}"))
+                    logger.error(f"Failed session {session_dir.name}", exc_info=True)
+                    continue
+                if saved:
+                    saved_sessions.append((session_dir.name, *saved))
+                else:
+                    processed_count += 1
+
+            # One DELETE of the old frames, then the new ones streamed per session
+            processed_count += replace_frames(self, saved_sessions)
 
         self.stdout.write(self.style.SUCCESS(f"Done. Imported {processed_count} session(s)."))
 
     def get_sample_timestamp(self, session_dir):
-        ts_files = list(session_dir.glob("*timestamp*.txt"))
-        if not ts_files: return None
+        ts_file = self._find_timestamp_file(session_dir)
+        if not ts_file: return None
         try:
-            with open(ts_files[0], 'r') as f:
+            with open(ts_file.path, 'r') as f:
                 for line in f:
                     parts = line.strip().split(' ')
                     if len(parts) >= 2:
-                        return datetime.fromtimestamp(int(parts[1]) / 1000.0, tz=timezone.utc)
+                        return datetime.fromtimestamp(int(parts[1]) / 1000.0, UTC)
         except: return None
 
-    def process_session(self, session_dir, deployment, nav_samples, is_dry_run):
+    def _find_timestamp_file(self, session_dir):
+        """First *timestamp*.txt entry of a session folder (os.DirEntry), or None."""
+        with os.scandir(session_dir) as it:
+            return next((
+                e for e in it
+                if 'timestamp' in e.name and e.name.endswith('.txt')
+                and not e.name.startswith('.') and e.is_file()
+            ), None)
+
+    def _read_timestamp_file(self, path):
+        """
+        Parses a timestamp file into (frame_nums, epoch_ms) int64 arrays in file order.
+        When every line is exactly "image<N> <epoch_ms>" the buffer is validated with one regex
+        match and its numbers read by numpy in one call; otherwise each line is parsed defensively.
+        """
+        # One read of the whole file as bytes: no per-line decode or str objects
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        # Fast path for well-formed files (blank or odd lines fall through).
+        # fromstring with sep parses text (the non-deprecated form; frombuffer only reads binary)
+        if TIMESTAMP_FILE_RE.fullmatch(data):
+            columns = np.fromstring(data.replace(IMAGE_PREFIX, b''), dtype=np.int64, sep=' ').reshape(-1, 2)
+            return columns[:, 0], columns[:, 1]
+
+        frame_nums = []
+        epoch_ms_list = []
+        prefix_len = len(IMAGE_PREFIX)
+        for line in data.splitlines():
+            parts = line.strip().split(b' ')
+            if len(parts) < 2: continue
+
+            try:
+                # Parse "image123" -> 123
+                img_name = parts[0]
+                if img_name.startswith(IMAGE_PREFIX):
+                    img_name = img_name[prefix_len:]
+                frame_num = int(img_name)
+                epoch_ms = int(parts[1])
+            except ValueError:
+                continue
+            frame_nums.append(frame_num)
+            epoch_ms_list.append(epoch_ms)
+
+        return np.array(frame_nums, dtype=np.int64), np.array(epoch_ms_list, dtype=np.int64)
+
+    def process_session(self, session_dir, deployment, nav_ids, nav_us, is_dry_run):
         self.stdout.write(f"--> Processing {session_dir.name}")
 
         # 1. Calc Path
-        project_root = settings.PROJECT_DIR.resolve()
         try:
-            stored_path_str = str(session_dir.resolve().relative_to(project_root))
+            stored_path_str = str(session_dir.relative_to(self.project_root))
         except ValueError:
              raise CommandError(f"Folder not in project root.")
 
         # 2. Parse Timestamps
-        ts_files = list(session_dir.glob("*timestamp*.txt"))
-        if not ts_files: raise CommandError("No timestamp file found.")
-        ts_file_path = ts_files[0]
+        ts_file = self._find_timestamp_file(session_dir)
+        if not ts_file: raise CommandError("No timestamp file found.")
 
-        # Store tuples of (frame_number, timestamp)
+        # Parallel (frame_number, epoch_ms) columns
         # We assume image0 corresponds to frame_number 0
-        frame_data = [] 
-        
-        with open(ts_file_path, 'r') as f:
-            for line in f:
-                stripped = line.strip()
-                if not stripped: continue
-                parts = stripped.split(' ')
-                if len(parts) < 2: continue
-                
-                try:
-                    # Parse "image123" -> 123
-                    img_name = parts[0]
-                    # Simple extraction: remove 'image' prefix, parse int
-                    # If naming is just "image0", "image1"...
-                    frame_num = int(img_name.replace('image', ''))
-                    
-                    epoch_ms = int(parts[1])
-                    dt = datetime.fromtimestamp(epoch_ms / 1000.0, tz=timezone.utc)
-                    frame_data.append((frame_num, dt))
-                except ValueError:
-                    pass
-
-        if not frame_data:
+        frame_nums, epoch_ms = self._read_timestamp_file(ts_file.path)
+
+        if not len(frame_nums):
              raise CommandError("No valid data parsed from timestamp file.")
 
-        # Sort by frame number just in case file is out of order
-        frame_data.sort(key=lambda x: x[0])
-        
-        start_time = frame_data[0][1]
-        end_time = frame_data[-1][1]
-        image_count = len(frame_data)
+        # Sort by frame number just in case file is out of order (stable, like list.sort)
+        order = np.argsort(frame_nums, kind='stable')
+        frame_nums = frame_nums[order]
+        epoch_ms = epoch_ms[order]
+
+        start_time = datetime.fromtimestamp(epoch_ms[0] / 1000.0, UTC)
+        end_time = datetime.fromtimestamp(epoch_ms[-1] / 1000.0, UTC)
+        image_count = len(frame_nums)
 
         if is_dry_run:
             self.stdout.write(f"   [DRY] MediaAsset: {image_count} images, {start_time}-{end_time}")
             return
 
+        # Closest NavSample for every frame in one vectorized pass
+        closest_ids = diffs = None
+        if len(nav_us):
+            idx, diffs = match_nav(epoch_ms * 1000, nav_us)
+            closest_ids = nav_ids[idx]
+
         # 3. Save MediaAsset
-        with transaction.atomic():
-            asset, created = MediaAsset.objects.update_or_create(
-                deployment=deployment,
-                file_path=stored_path_str,
-                media_type=MediaAsset.MediaType.IMAGE_SET,
-                defaults={
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'fps': None,
-                    'file_metadata': {
-                        'image_count': image_count,
-                        'session_folder_name': session_dir.name,
-                        'timestamp_source_file': ts_file_path.name
-                    },
-                    'notes': f"Imported session {session_dir.name}"
-                }
-            )
+        asset, created = MediaAsset.objects.update_or_create(
+            deployment=deployment,
+            file_path=stored_path_str,
+            media_type=MediaAsset.MediaType.IMAGE_SET,
+            defaults={
+                'start_time': start_time,
+                'end_time': end_time,
+                'fps': None,
+                'file_metadata': {
+                    'image_count': image_count,
+                    'session_folder_name': session_dir.name,
+                    'timestamp_source_file': ts_file.name
+                },
+                'notes': f"Imported session {session_dir.name}"
+            }
+        )
 
-            # 4. Populate FrameIndex (The matching logic)
-            # Delete old frames if we are re-importing (to avoid duplicates/stale links)
-            FrameIndex.objects.filter(media_asset=asset).delete()
-
-            frame_batch = []
-            nav_timestamps = [n['timestamp'] for n in nav_samples]
-            nav_count = len(nav_samples)
-
-            for f_num, f_ts in frame_data:
-                # Binary Search for closest NavSample
-                closest_nav_id = None
-                time_diff_ms = None
-
-                if nav_count > 0:
-                    pos = bisect_left(nav_timestamps, f_ts)
-                    if pos == 0:
-                        idx = 0
-                    elif pos == nav_count:
-                        idx = nav_count - 1
-                    else:
-                        before = nav_timestamps[pos - 1]
-                        after = nav_timestamps[pos]
-                        if abs((f_ts - before).total_seconds()) <= abs((after - f_ts).total_seconds()):
-                            idx = pos - 1
-                        else:
-                            idx = pos
-                    
-                    closest_nav_id = nav_samples[idx]['id']
-                    time_diff = (f_ts - nav_samples[idx]['timestamp']).total_seconds() * 1000
-                    time_diff_ms = int(abs(time_diff))
-
-                frame_batch.append(FrameIndex(
-                    media_asset=asset,
-                    frame_number=f_num,
-                    timestamp=f_ts,
-                    closest_nav_sample_id=closest_nav_id,
-                    nav_match_time_diff_ms=time_diff_ms
-                ))
-
-            # Bulk Create
-            FrameIndex.objects.bulk_create(frame_batch)
-            self.stdout.write(f"   [SAVED] Asset ID {asset.id} + {len(frame_batch)} FrameIndex records")
\ No newline at end of file
+        # Frames stay as int64 arrays until handle() streams them, after the old ones are deleted
+        return asset, frame_rows(frame_nums, epoch_ms, closest_ids, diffs)
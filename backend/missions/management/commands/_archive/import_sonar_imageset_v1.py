@@ -1,23 +1,28 @@
 import os
 import sys
-import re
 import logging
-import concurrent.futures
+import numpy as np
 from pathlib import Path
-from datetime import datetime, timezone
-from bisect import bisect_left
+from datetime import datetime
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.db.models import Q
 from django.db import transaction
 
-from missions.models import Mission, Sensor, SensorDeployment, MediaAsset, FrameIndex, NavSample
+from missions.models import Mission, Sensor, SensorDeployment, MediaAsset, NavSample
+from missions.management.commands._frameindex import UTC, EPOCH, ONE_US, match_nav, frame_rows, replace_frames
 
 logger = logging.getLogger(__name__)
 
+# Raw frame files: sonoptix-frame<N>.txt, "<label> <epoch_ms> ..." on the first line
+FRAME_FILE_PREFIX = "sonoptix-frame"
+FRAME_FILE_SUFFIX = ".txt"
+# Enough of the file to hold the first line's leading fields
+FRAME_HEADER_BYTES = 128
+
 class Command(BaseCommand):
-    help = 'Import Sonoptix Sonar Image Sets (Optimized/Threaded) and populate FrameIndex.'
+    help = 'Import Sonoptix Sonar Image Sets (Optimized) and populate FrameIndex.'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -60,6 +65,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("!!! DRY RUN MODE: No changes will be saved !!!"))
 
         # --- 1. Path Verification ---
+        # Resolved once; session folders found under the canonical images path are made
+        # relative to it without resolving each one again
+        self.project_root = settings.PROJECT_DIR.resolve()
         input_path = Path(data_root_str)
         if input_path.is_absolute():
             mission_path = input_path.resolve()
@@ -70,7 +78,7 @@ class Command(BaseCommand):
              raise CommandError(f"Mission root path does not exist: {mission_path}")
 
         sonar_root = mission_path / 'sonar'
-        images_root = sonar_root / 'images'
+        images_root = (sonar_root / 'images').resolve()
         raw_root = sonar_root / 'raw'
 
         if not images_root.exists(): raise CommandError(f"Expected folder not found: {images_root}")
@@ -78,10 +86,12 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Scanning Sonar Data: {sonar_root}")
 
-        image_sessions = sorted([
-            d for d in images_root.iterdir() 
-            if d.is_dir() and d.name.startswith("session_")
-        ])
+        # os.scandir answers is_dir() from the directory entry, no stat per child
+        with os.scandir(images_root) as it:
+            image_sessions = sorted(
+                Path(e.path) for e in it
+                if e.name.startswith("session_") and e.is_dir()
+            )
 
         if not image_sessions:
              raise CommandError(f"No 'session_*' directories found in {images_root}.")
@@ -105,12 +115,14 @@ class Command(BaseCommand):
             (Q(end_time__gte=sample_dt) | Q(end_time__isnull=True))
         )
 
-        if candidates.count() == 0:
+        # Two rows are enough to tell none / one / ambiguous in a single query
+        cand_list = list(candidates[:2])
+        if len(cand_list) == 0:
             raise CommandError(f"No Mission found covering the time {sample_dt}.")
-        elif candidates.count() > 1:
+        elif len(cand_list) > 1:
             raise CommandError(f"Ambiguous! Multiple missions match this time: {candidates}")
         
-        mission = candidates.first()
+        mission = cand_list[0]
 
         # --- 3. Confirmation ---
         self.stdout.write(self.style.SUCCESS("-" * 40))
@@ -126,7 +138,7 @@ class Command(BaseCommand):
         # --- 4. Load Data ---
         try:
             sensor = Sensor.objects.get(name=sensor_name)
-            deployment = SensorDeployment.objects.get(
+            deployment = SensorDeployment.objects.select_related('mission', 'sensor').get(
                 mission=mission, sensor=sensor, instance=instance_num
             )
         except Exception as e:
@@ -134,145 +146,139 @@ class Command(BaseCommand):
 
         # OPTIMIZATION: Use values_list for faster tuple access and lower memory
         self.stdout.write("Loading NavSamples (optimized)...")
-        nav_data = list(NavSample.objects.filter(mission=mission)
-                        .order_by('timestamp')
-                        .values_list('id', 'timestamp'))
-        
-        # Unzip into separate lists for bisect
-        if nav_data:
-            nav_ids, nav_timestamps = zip(*nav_data)
-        else:
-            nav_ids, nav_timestamps = [], []
+        # Two parallel columns (sorted epoch microseconds + ids) filled in one pass
+        # over a streamed tuple cursor, shared by every session
+        nav_ids, nav_us = [], []
+        rows = (
+            NavSample.objects.filter(mission=mission)
+            .order_by('timestamp')
+            .values_list('id', 'timestamp')
+            .iterator(chunk_size=50000)
+        )
+        for n_id, ts in rows:
+            nav_ids.append(n_id)
+            nav_us.append((ts - EPOCH) // ONE_US)
+        nav_ids = np.array(nav_ids, dtype=np.int64)
+        nav_us = np.array(nav_us, dtype=np.int64)
 
         # --- 5. Process Sessions ---
+        # One transaction for the whole import. Each session's asset is upserted under its own
+        # savepoint, so a failed session is rolled back alone and keeps its previous frames.
         processed_count = 0
-        for img_session_dir in image_sessions:
-            session_name = img_session_dir.name
-            raw_session_dir = raw_root / session_name
-            
-            if not raw_session_dir.exists(): continue
-
-            try:
-                self.process_session(
-                    img_session_dir, raw_session_dir, deployment, 
-                    nav_ids, nav_timestamps, is_dry_run
-                )
-                processed_count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed session {session_name}: {e}"))
-                logger.error(f"Failed session {session_name}", exc_info=True)
+        saved_sessions = []
+        with transaction.atomic():
+            for img_session_dir in image_sessions:
+                session_name = img_session_dir.name
+                raw_session_dir = raw_root / session_name
+
+                if not raw_session_dir.exists(): continue
+
+                try:
+                    with transaction.atomic():
+                        saved = self.process_session(
+                            img_session_dir, raw_session_dir, deployment,
+                            nav_ids, nav_us, is_dry_run
+                        )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Failed session {session_name}: {e}"))
+                    logger.error(f"Failed session {session_name}", exc_info=True)
+                    continue
+                if saved:
+                    saved_sessions.append((session_name, *saved))
+                else:
+                    processed_count += 1
+
+            # One DELETE of the old frames, then the new ones streamed per session
+            processed_count += replace_frames(self, saved_sessions)
 
         self.stdout.write(self.style.SUCCESS(f"Done. Imported {processed_count} session(s)."))
 
     def get_sample_timestamp(self, raw_session_dir):
         # Quick check for one valid file
-        txt_files = list(raw_session_dir.glob("sonoptix-frame*.txt"))
-        for txt_file in txt_files:
-            res = self._parse_frame_file(txt_file)
-            if res: return res[1]
+        for entry in self._scan_frame_files(raw_session_dir):
+            res = self._parse_frame_file(entry)
+            if res: return datetime.fromtimestamp(res[1] / 1000.0, UTC)
         return None
 
-    def _parse_frame_file(self, file_path):
-        """Helper to parse a single file. Returns (frame_num, dt) or None."""
+    def _scan_frame_files(self, raw_session_dir):
+        """Lists the sonoptix-frame*.txt entries of a raw session folder with os.scandir."""
+        with os.scandir(raw_session_dir) as it:
+            return [
+                e for e in it
+                if e.name.startswith(FRAME_FILE_PREFIX) and e.name.endswith(FRAME_FILE_SUFFIX) and e.is_file()
+            ]
+
+    def _parse_frame_file(self, entry):
+        """Helper to parse a single os.DirEntry. Returns (frame_num, epoch_ms) or None."""
         try:
-            match = re.search(r'frame(\d+)\.txt', file_path.name)
-            if not match: return None
-            frame_num = int(match.group(1))
-
-            with open(file_path, 'r') as f:
-                first_line = f.readline()
-                parts = first_line.strip().split(' ')
-                if len(parts) >= 2:
-                    epoch_ms = int(parts[1])
-                    dt = datetime.fromtimestamp(epoch_ms / 1000.0, tz=timezone.utc)
-                    return (frame_num, dt)
+            # Prefix/suffix are fixed (checked by _scan_frame_files), so slice out the number
+            digits = entry.name[len(FRAME_FILE_PREFIX):-len(FRAME_FILE_SUFFIX)]
+            if not digits.isdigit(): return None
+            frame_num = int(digits)
+
+            # Raw fd read: only the start of the first line is needed
+            fd = os.open(entry.path, os.O_RDONLY)
+            try:
+                buf = os.read(fd, FRAME_HEADER_BYTES)
+            finally:
+                os.close(fd)
+
+            parts = buf.split(b'\n', 1)[0].strip().split(b' ')
+            if len(parts) >= 2:
+                return (frame_num, int(parts[1]))
         except Exception:
             return None
         return None
 
     def process_session(self, img_session_dir, raw_session_dir, deployment, 
-                        nav_ids, nav_timestamps, is_dry_run):
+                        nav_ids, nav_us, is_dry_run):
         
         self.stdout.write(f"--> Processing {img_session_dir.name}")
-        project_root = settings.PROJECT_DIR.resolve()
-        
+
         try:
-            stored_path_str = str(img_session_dir.resolve().relative_to(project_root))
+            stored_path_str = str(img_session_dir.relative_to(self.project_root))
         except ValueError:
              raise CommandError(f"Folder not in project root.")
 
-        txt_files = list(raw_session_dir.glob("sonoptix-frame*.txt"))
+        txt_files = self._scan_frame_files(raw_session_dir)
         if not txt_files: raise CommandError("No text files found.")
 
-        # --- PARALLEL PROCESSING START ---
+        # One small read per file; sequential raw syscalls beat a thread pool at this size
         frame_data = []
-        # Use ThreadPoolExecutor to mask I/O latency
-        # Adjust max_workers based on your disk (10-20 is usually good for simple text files)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            # Submit all file parsing jobs
-            future_to_file = {executor.submit(self._parse_frame_file, f): f for f in txt_files}
-            
-            # Gather results as they complete
-            for future in concurrent.futures.as_completed(future_to_file):
-                result = future.result()
-                if result:
-                    frame_data.append(result)
-        # --- PARALLEL PROCESSING END ---
+        for entry in txt_files:
+            result = self._parse_frame_file(entry)
+            if result:
+                frame_data.append(result)
 
         if not frame_data: raise CommandError("No valid data parsed.")
         
         frame_data.sort(key=lambda x: x[0])
-        start_time, end_time = frame_data[0][1], frame_data[-1][1]
+        # Frames stay as (frame_num, epoch_ms) int64 columns; datetimes are built only for the stored rows
+        frame_nums, epoch_ms = np.array(frame_data, dtype=np.int64).T
+        start_time = datetime.fromtimestamp(epoch_ms[0] / 1000.0, UTC)
+        end_time = datetime.fromtimestamp(epoch_ms[-1] / 1000.0, UTC)
         image_count = len(frame_data)
 
         if is_dry_run:
             self.stdout.write(f"   [DRY] {image_count} frames, {start_time:%H:%M:%S}-{end_time:%H:%M:%S}")
             return
 
-        with transaction.atomic():
-            asset, _ = MediaAsset.objects.update_or_create(
-                deployment=deployment,
-                file_path=stored_path_str,
-                media_type=MediaAsset.MediaType.IMAGE_SET,
-                defaults={
-                    'start_time': start_time, 'end_time': end_time, 'fps': None,
-                    'file_metadata': {'image_count': image_count, 'raw_data_folder': raw_session_dir.name},
-                    'notes': f"Imported Sonoptix session {img_session_dir.name}"
-                }
-            )
+        # Closest NavSample for every frame in one vectorized pass
+        closest_ids = diffs = None
+        if len(nav_us):
+            idx, diffs = match_nav(epoch_ms * 1000, nav_us)
+            closest_ids = nav_ids[idx]
+
+        asset, _ = MediaAsset.objects.update_or_create(
+            deployment=deployment,
+            file_path=stored_path_str,
+            media_type=MediaAsset.MediaType.IMAGE_SET,
+            defaults={
+                'start_time': start_time, 'end_time': end_time, 'fps': None,
+                'file_metadata': {'image_count': image_count, 'raw_data_folder': raw_session_dir.name},
+                'notes': f"Imported Sonoptix session {img_session_dir.name}"
+            }
+        )
 
-            # Cleanup old frames
-            FrameIndex.objects.filter(media_asset=asset).delete()
-
-            # Batch create FrameIndex
-            frame_batch = []
-            nav_count = len(nav_timestamps)
-
-            for f_num, f_ts in frame_data:
-                closest_nav_id = None
-                time_diff_ms = None
-
-                if nav_count > 0:
-                    pos = bisect_left(nav_timestamps, f_ts)
-                    idx = 0
-                    if pos == 0: idx = 0
-                    elif pos == nav_count: idx = nav_count - 1
-                    else:
-                        before = nav_timestamps[pos - 1]
-                        after = nav_timestamps[pos]
-                        if abs((f_ts - before).total_seconds()) <= abs((after - f_ts).total_seconds()):
-                            idx = pos - 1
-                        else:
-                            idx = pos
-                    
-                    closest_nav_id = nav_ids[idx]
-                    time_diff = (f_ts - nav_timestamps[idx]).total_seconds() * 1000
-                    time_diff_ms = int(abs(time_diff))
-
-                frame_batch.append(FrameIndex(
-                    media_asset=asset, frame_number=f_num, timestamp=f_ts,
-                    closest_nav_sample_id=closest_nav_id, nav_match_time_diff_ms=time_diff_ms
-                ))
-
-            FrameIndex.objects.bulk_create(frame_batch)
-            self.stdout.write(f"   [SAVED] Asset ID {asset.id} + {len(frame_batch)} frames")
\ No newline at end of file
+        # Frames stay as int64 arrays until handle() streams them, after the old ones are deleted
+        return asset, frame_rows(frame_nums, epoch_ms, closest_ids, diffs)
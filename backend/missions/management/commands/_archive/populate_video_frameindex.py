@@ -32,8 +32,8 @@ class Command(BaseCommand):
         parser.add_argument(
             "--batch-size", 
             type=int, 
-            default=1000, 
-            help="Batch size for bulk insert operations."
+            default=10000, 
+            help="Batch size for bulk insert operations (default: 10000)."
         )
         parser.add_argument(
             "--force", 
@@ -121,7 +121,7 @@ class FrameIndexProcessor:
     NavSample records for a given mission.
     """
     
-    def __init__(self, media_asset, mission, batch_size=1000, force=False, stdout=None):
+    def __init__(self, media_asset, mission, batch_size=10000, force=False, stdout=None):
         self.media_asset = media_asset
         self.mission = mission
         self.batch_size = batch_size
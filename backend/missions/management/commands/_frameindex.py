@@ -0,0 +1,124 @@
+"""
+FrameIndex helpers shared by the session and image-set importers: nearest nav sample
+matching on epoch microseconds and batched FrameIndex inserts (COPY on PostgreSQL).
+copy_value is also used by parse_bin_log for its sample COPY rows.
+"""
+import io
+import logging
+from datetime import datetime, timezone, timedelta
+from itertools import islice, repeat
+
+import numpy as np
+from django.db import connection, transaction
+
+from missions.models import FrameIndex
+
+logger = logging.getLogger(__name__)
+
+# Passing the tz positionally to datetime.fromtimestamp skips keyword parsing on per-frame calls
+UTC = timezone.utc
+
+# Nav matching runs on int64 epoch microseconds
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+ONE_US = timedelta(microseconds=1)
+
+# Rows buffered per COPY FROM STDIN when writing FrameIndex on PostgreSQL
+COPY_BATCH_SIZE = 50000
+
+
+def match_nav(frame_us, nav_us):
+    """
+    Nearest nav sample for each frame time (both sorted int64 epoch microseconds).
+    Returns (indices into nav_us, absolute time difference in ms).
+    Ties go to the earlier sample.
+    """
+    last = len(nav_us) - 1
+    pos = np.searchsorted(nav_us, frame_us, side='left')
+    before = nav_us[np.maximum(pos - 1, 0)]
+    after = nav_us[np.minimum(pos, last)]
+    use_before = (pos > 0) & (np.abs(frame_us - before) <= np.abs(after - frame_us))
+    # Past the last sample before == after, so use_before is always set and pos - 1 == last
+    idx = pos - use_before.astype(np.int64)
+    diffs_ms = (np.abs(frame_us - nav_us[idx]) / 1e6 * 1000).astype(np.int64)
+    return idx, diffs_ms
+
+
+def insert_frames(asset_id, rows, batch_size=10000):
+    """
+    Inserts FrameIndex rows for the asset `asset_id` from an iterable of
+    (frame_number, timestamp, closest_nav_sample_id, nav_match_time_diff_ms) tuples,
+    consumed one batch at a time. On PostgreSQL the rows are streamed with
+    COPY FROM STDIN instead of going through model instances and INSERTs.
+    """
+    rows = iter(rows)
+
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name(FrameIndex._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(FrameIndex._meta.get_field(name).column) for name in (
+            'media_asset', 'frame_number', 'timestamp', 'closest_nav_sample', 'nav_match_time_diff_ms'
+        ))
+        sql = f"COPY {table} ({columns}) FROM STDIN"
+        with connection.cursor() as cursor:
+            while True:
+                buf = io.StringIO()
+                for f_num, f_ts, nav_id, diff in islice(rows, COPY_BATCH_SIZE):
+                    buf.write(f"{asset_id}\t{f_num}\t{f_ts.isoformat()}\t{copy_value(nav_id)}\t{copy_value(diff)}\n")
+                if not buf.tell():
+                    break
+                buf.seek(0)
+                cursor.copy_expert(sql, buf)
+        return
+
+    # bulk_create list()s whatever it is given, so hand it one batch of model instances at a time
+    while True:
+        batch = [
+            FrameIndex(
+                media_asset_id=asset_id, frame_number=f_num, timestamp=f_ts,
+                closest_nav_sample_id=nav_id, nav_match_time_diff_ms=diff
+            )
+            for f_num, f_ts, nav_id, diff in islice(rows, batch_size)
+        ]
+        if not batch:
+            break
+        FrameIndex.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def replace_frames(command, sessions):
+    """
+    Replaces the frames of freshly upserted assets inside the caller's transaction.
+    `sessions` holds (session_name, asset, rows) with rows as taken by insert_frames.
+    The old frames of every asset go in one DELETE; the new ones are then streamed one
+    session at a time, each under its own savepoint so a failed session is rolled back
+    alone (its asset is left without frames). Returns the number of sessions written.
+    """
+    FrameIndex.objects.filter(media_asset_id__in=[asset.id for _, asset, _ in sessions]).delete()
+
+    written = 0
+    for session_name, asset, rows in sessions:
+        try:
+            with transaction.atomic():
+                insert_frames(asset.id, rows)
+        except Exception as e:
+            command.stdout.write(command.style.ERROR(f"Failed frames of session {session_name}: {e}"))
+            logger.error(f"Failed frames of session {session_name}", exc_info=True)
+            continue
+        command.stdout.write(f"   [SAVED] Asset ID {asset.id} + {asset.file_metadata['image_count']} FrameIndex records")
+        written += 1
+    return written
+
+
+def frame_rows(frame_nums, epoch_ms, nav_ids=None, diffs_ms=None):
+    """
+    Lazily yields insert_frames rows from parallel int64 arrays of frame numbers and epoch
+    milliseconds, plus the matched nav sample ids / time differences (None without nav data).
+    The arrays only become Python objects once iteration starts.
+    """
+    nav_ids = repeat(None) if nav_ids is None else nav_ids.tolist()
+    diffs_ms = repeat(None) if diffs_ms is None else diffs_ms.tolist()
+    for f_num, ms, nav_id, diff in zip(frame_nums.tolist(), epoch_ms.tolist(), nav_ids, diffs_ms):
+        yield f_num, datetime.fromtimestamp(ms / 1000.0, UTC), nav_id, diff
+
+
+def copy_value(value):
+    """Formats a nullable value for PostgreSQL COPY text format."""
+    return r'\N' if value is None else str(value)
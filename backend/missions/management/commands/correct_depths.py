@@ -1,7 +1,9 @@
-import math
+import numpy as np
 from datetime import timedelta
 from django.core.management.base import BaseCommand
-from django.db.models import F
+from django.db import connection, transaction
+from django.db.models import F, Min, Max
+from django.db.models.functions import Coalesce
 from missions.models import Mission, NavSample, TideLevel, MediaAsset
 
 class Command(BaseCommand):
@@ -20,10 +22,17 @@ class Command(BaseCommand):
             choices=['ponta_delgada', 'horta'],
             help='The port to use for tide reference.'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of NavSamples written per UPDATE statement (default: 10000).'
+        )
 
     def handle(self, *args, **options):
         mission_id = options['mission_id']
         port_name = options['port_name']
+        batch_size = options['batch_size']
 
         # 1. Filter Missions
         missions = Mission.objects.all()
@@ -37,15 +46,30 @@ class Command(BaseCommand):
         for mission in missions:
             self.stdout.write(f"--> Processing Mission {mission.id}...")
             
-            # Fetch all samples for this mission, ordered by time
-            samples = list(NavSample.objects.filter(mission=mission).order_by('timestamp'))
-            
-            if not samples:
+            # Stream only the columns needed for the correction, skipping samples without a depth reading
+            rows = (
+                NavSample.objects.filter(mission=mission, depth_m__isnull=False)
+                .order_by('timestamp')
+                .values_list('pk', 'timestamp', 'depth_m')
+                .iterator(chunk_size=5000)
+            )
+
+            sample_pks, sample_times, depths = [], [], []
+            first_ts = last_ts = None
+            for pk, timestamp, depth in rows:
+                if first_ts is None:
+                    first_ts = timestamp
+                last_ts = timestamp
+                sample_pks.append(pk)
+                sample_times.append(timestamp.timestamp())
+                depths.append(depth)
+
+            if not sample_pks:
                 continue
 
             # Optimize Tide Loading: Get tides overlapping the mission duration (with 7h buffer)
-            start_time = samples[0].timestamp - timedelta(hours=7)
-            end_time = samples[-1].timestamp + timedelta(hours=7)
+            start_time = first_ts - timedelta(hours=7)
+            end_time = last_ts + timedelta(hours=7)
             
             tide_events = list(TideLevel.objects.filter(
                 port_name=port_name,
@@ -56,82 +80,117 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f"   No tide data found for Mission {mission.id} range."))
                 continue
 
-            samples_to_update = []
-
-            # Iterate through samples and correct depth
-            for sample in samples:
-                if sample.depth_m is None:
-                    continue
-
-                # Find surrounding tide events
-                prev_event, next_event = self.get_surrounding_tides(sample.timestamp, tide_events)
-
-                if prev_event and next_event:
-                    # Calculate Tide Height (y) using the unified formula
-                    tide_height = self.calculate_tide_height(sample.timestamp, prev_event, next_event)
-                    
-                    # Apply Correction: 
-                    # Corrected Depth = Measured Depth - Tide Height 
-                    # (Assuming positive tide increases sensor reading, so we subtract to normalize to Chart Datum)
-                    sample.corrected_depth_m = sample.depth_m - tide_height
-                    samples_to_update.append(sample)
-            
-            # Perform Bulk Update for speed
-            if samples_to_update:
-                NavSample.objects.bulk_update(samples_to_update, ['corrected_depth_m'], batch_size=1000)
-                total_updated += len(samples_to_update)
-                self.stdout.write(f"   Updated {len(samples_to_update)} samples.")
+            # Build flat arrays once so the interpolation runs as a single vectorized pass
+            tide_times = np.array([e.time.timestamp() for e in tide_events], dtype=np.float64)
+            tide_heights = np.array([e.tide_height_m for e in tide_events], dtype=np.float64)
+            sample_pks = np.array(sample_pks, dtype=np.int64)
+            sample_times = np.array(sample_times, dtype=np.float64)
+            depths = np.array(depths, dtype=np.float64)
+
+            tide_height = self.calculate_tide_heights(sample_times, tide_times, tide_heights)
+
+            # Apply Correction:
+            # Corrected Depth = Measured Depth - Tide Height
+            # (Assuming positive tide increases sensor reading, so we subtract to normalize to Chart Datum)
+            corrected = depths - tide_height
+            valid = ~np.isnan(corrected)
+
+            pks = sample_pks[valid].tolist()
+            values = corrected[valid].tolist()
+
+            # One transaction per mission: the sample batches and the asset stats commit together
+            if not pks:
+                continue
+
+            with transaction.atomic():
+                self.update_corrected_depths(pks, values, batch_size)
+                total_updated += len(pks)
+                self.stdout.write(f"   Updated {len(pks)} samples.")
 
                 self.stdout.write("   Recalculating statistics for affected MediaAssets...")
-                # Find all assets linked to this mission via their deployment
-                assets = MediaAsset.objects.filter(deployment__mission=mission)
-                
-                count = 0
+                # Find all assets linked to this mission via their deployment and
+                # aggregate their frame depths in one query (same logic as MediaAsset.calculate_stats)
+                frame_depth = Coalesce(
+                    'frames__closest_nav_sample__corrected_depth_m',
+                    'frames__closest_nav_sample__depth_m'
+                )
+                assets = list(
+                    MediaAsset.objects.filter(deployment__mission=mission)
+                    .annotate(min_d=Min(frame_depth), max_d=Max(frame_depth))
+                    .only('id', 'min_depth_m', 'max_depth_m')
+                )
+
                 for asset in assets:
-                    asset.calculate_stats() # Recalculates using the new corrected depths
-                    count += 1
-                
-                self.stdout.write(f"   Updated stats for {count} assets.")
+                    asset.min_depth_m = asset.min_d
+                    asset.max_depth_m = asset.max_d
+
+                MediaAsset.objects.bulk_update(assets, ['min_depth_m', 'max_depth_m'], batch_size=1000)
+                self.stdout.write(f"   Updated stats for {len(assets)} assets.")
         
         self.stdout.write(self.style.SUCCESS(f"Finished. Successfully corrected {total_updated} NavSamples."))
 
-    def get_surrounding_tides(self, sample_time, tide_events):
+    def update_corrected_depths(self, pks, values, batch_size):
         """
-        Finds the tide event immediately before and immediately after the sample time.
+        Writes corrected_depth_m for the given NavSample pks.
+        On PostgreSQL each batch is a single UPDATE ... FROM (VALUES ...) statement,
+        which scales linearly unlike the CASE/WHEN SQL emitted by bulk_update.
         """
-        # Since tide_events is sorted, we iterate to find the interval
-        for i in range(len(tide_events) - 1):
-            if tide_events[i].time <= sample_time <= tide_events[i+1].time:
-                return tide_events[i], tide_events[i+1]
-        
-        return None, None
-
-    def calculate_tide_height(self, current_time, prev_event, next_event):
+        if connection.vendor != 'postgresql':
+            NavSample.objects.bulk_update(
+                [NavSample(pk=pk, corrected_depth_m=value) for pk, value in zip(pks, values)],
+                ['corrected_depth_m'],
+                batch_size=batch_size
+            )
+            return
+
+        table = connection.ops.quote_name(NavSample._meta.db_table)
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), batch_size):
+                rows = list(zip(pks[start:start + batch_size], values[start:start + batch_size]))
+                placeholders = ", ".join(["(%s, %s)"] * len(rows))
+                params = [param for row in rows for param in row]
+                cursor.execute(
+                    f"UPDATE {table} AS t SET corrected_depth_m = v.depth::double precision "
+                    f"FROM (VALUES {placeholders}) AS v(id, depth) WHERE t.id = v.id",
+                    params
+                )
+
+    def calculate_tide_heights(self, sample_times, tide_times, tide_heights):
         """
-        Calculates tide height (y) at a specific instant (t) using the cosine interpolation method.
-        
+        Calculates tide height (y) for every sample instant (t) using the cosine interpolation method.
+        All inputs are float64 arrays; times are unix seconds and tide_times must be sorted.
+        Samples not bracketed by two tide events are returned as NaN.
+
         Formula derived from Instituto Hidrográfico:
         y = (H_start + H_end)/2 + (H_start - H_end)/2 * cos(pi * t / T)
-        
+
         This works mathematically for both:
         - Falling Tide (a): H_start > H_end
         - Rising Tide (b): H_start < H_end
         """
-        # T: Total duration between events in seconds
-        T_seconds = (next_event.time - prev_event.time).total_seconds()
-        if T_seconds == 0: return prev_event.tide_height_m
+        heights = np.full(sample_times.shape, np.nan)
+        if len(tide_times) < 2:
+            return heights
 
-        # t: Time elapsed since previous event
-        t_seconds = (current_time - prev_event.time).total_seconds()
+        # Index of the tide event immediately before (or at) each sample.
+        # A sample landing exactly on the last event is folded into the final interval.
+        idx = np.searchsorted(tide_times, sample_times, side='right') - 1
+        idx = np.clip(idx, 0, len(tide_times) - 2)
+        in_range = (sample_times >= tide_times[0]) & (sample_times <= tide_times[-1])
 
         # Tide Heights
-        H_start = prev_event.tide_height_m
-        H_end   = next_event.tide_height_m
+        H_start = tide_heights[idx]
+        H_end = tide_heights[idx + 1]
 
-        # Unified Formula
-        term1 = (H_start + H_end) / 2
-        term2 = (H_start - H_end) / 2
-        term3 = math.cos((math.pi * t_seconds) / T_seconds)
-        
-        y = term1 + (term2 * term3)
-        return y
\ No newline at end of file
+        # T: Total duration between events, t: time elapsed since previous event
+        T_seconds = tide_times[idx + 1] - tide_times[idx]
+        t_seconds = sample_times - tide_times[idx]
+
+        # Unified Formula (fall back to the previous height when both events share a timestamp)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            term3 = np.cos((np.pi * t_seconds) / T_seconds)
+        y = (H_start + H_end) / 2 + ((H_start - H_end) / 2) * term3
+        y = np.where(T_seconds == 0, H_start, y)
+
+        heights[in_range] = y[in_range]
+        return heights
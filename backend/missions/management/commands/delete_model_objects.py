@@ -31,12 +31,11 @@ class Command(BaseCommand):
         total_deleted = 0
         while True:
             with transaction.atomic():
-                # Get a batch of primary keys
-                pks = list(model.objects.values_list('pk', flat=True)[:batch_size])
-                if not pks:
+                # Select the batch of primary keys as a subquery so the IN list stays server-side
+                batch_pks = model.objects.order_by('pk').values_list('pk', flat=True)[:batch_size]
+                deleted_count, _ = model.objects.filter(pk__in=batch_pks).delete()
+                if not deleted_count:
                     break
-                # Delete by primary keys
-                deleted_count, _ = model.objects.filter(pk__in=pks).delete()
                 total_deleted += deleted_count
                 self.stdout.write(f"Deleted {deleted_count} objects from {model_label} (Total deleted: {total_deleted})")
 
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from missions.models import MediaAsset
-from django.db.models import Q
+from django.db.models import Q, Count
+from django.db import transaction
 
 class Command(BaseCommand):
     help = 'Calculates and fixes FPS metadata for video assets based on actual frame counts.'
@@ -16,26 +17,27 @@ class Command(BaseCommand):
         dry_run = options['dry_run']
         self.stdout.write(f"Starting FPS verification... (Dry Run: {dry_run})")
 
+        # Frame counts are computed in the same query to avoid one COUNT(*) per asset
         assets = MediaAsset.objects.filter(
             Q(media_type=MediaAsset.MediaType.VIDEO) | 
-            Q(media_type=MediaAsset.MediaType.IMAGE_SET)
-        ).iterator()
+            Q(media_type=MediaAsset.MediaType.IMAGE_SET),
+            start_time__isnull=False,
+            end_time__isnull=False,
+        ).annotate(
+            frame_count=Count('frames')
+        ).filter(frame_count__gt=0).iterator(chunk_size=1000)
 
+        to_update = []
         updated_count = 0
         crashed_count = 0
         skipped_count = 0
 
         for asset in assets:
-            if not asset.start_time or not asset.end_time:
-                continue
-
             duration = (asset.end_time - asset.start_time).total_seconds()
             if duration <= 0:
                 continue
 
-            frame_count = asset.frames.count()
-            if frame_count == 0:
-                continue
+            frame_count = asset.frame_count
 
             # Calculate the "Real" FPS
             calc_fps = frame_count / duration
@@ -67,12 +69,17 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING(f"[DRY RUN] {msg}"))
                 else:
                     asset.fps = new_fps
-                    asset.save(update_fields=['fps'])
+                    to_update.append(asset)
                     self.stdout.write(self.style.SUCCESS(f"✅ {msg}"))
                     updated_count += 1
             else:
                 skipped_count += 1
 
+        # Persist all FPS changes in one transaction
+        if to_update:
+            with transaction.atomic():
+                MediaAsset.objects.bulk_update(to_update, ['fps'], batch_size=10000)
+
         # Summary
         self.stdout.write("\n" + "-"*30)
         self.stdout.write(f"Finished processing.")
@@ -1,8 +1,12 @@
 import os
 import cv2
+import subprocess
 import logging
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from PIL import Image
+import django
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.db.models import Q
@@ -10,6 +14,9 @@ from missions.models import MediaAsset
 
 logger = logging.getLogger(__name__)
 
+# Thumbnail links saved per bulk_update while the workers are still running
+UPDATE_BATCH_SIZE = 200
+
 class Command(BaseCommand):
     help = 'Generates preview thumbnails for all MediaAssets (safe for V1/V2 structures).'
 
@@ -31,17 +38,24 @@ class Command(BaseCommand):
             default='all',
             help='Limit generation to a specific media type.'
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of worker processes used to build thumbnails (default: CPU count).'
+        )
 
     def handle(self, *args, **options):
         force = options['force']
         dry_run = options['dry_run']
         target_type = options['type']
+        jobs = max(1, options['jobs'] or 1)
 
         # Filter assets based on arguments
         filters = Q()
         if not force:
             filters &= (Q(thumbnail_path__isnull=True) | Q(thumbnail_path=''))
-        
+
         if target_type == 'video':
             filters &= Q(media_type=MediaAsset.MediaType.VIDEO)
         elif target_type == 'image':
@@ -49,151 +63,215 @@ class Command(BaseCommand):
         elif target_type == 'image_set':
             filters &= Q(media_type=MediaAsset.MediaType.IMAGE_SET)
 
-        assets = MediaAsset.objects.filter(filters)
-        self.stdout.write(f"Found {assets.count()} assets to process.")
+        # Plain dicts so the worker processes never touch the Django DB connection
+        asset_dicts = list(MediaAsset.objects.filter(filters).values(
+            'id', 'file_path', 'media_type', 'start_time', 'end_time'
+        ))
+        self.stdout.write(f"Found {len(asset_dicts)} assets to process.")
+
+        # Canonicalise the base once; asset paths are joined onto it without another realpath walk
+        project_dir = Path(settings.PROJECT_DIR).resolve()
 
-        for asset in assets:
+        to_update = []
+        # Workers run django.setup() first: under spawn/forkserver (macOS, Windows, Linux from
+        # Python 3.14) they start without the app registry that unpickling process_asset needs
+        with ProcessPoolExecutor(max_workers=jobs, initializer=django.setup) as executor:
+            results = executor.map(
+                process_asset, asset_dicts, repeat(project_dir), repeat(dry_run), chunksize=8
+            )
             try:
-                self.process_asset(asset, force, dry_run)
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed Asset {asset.id}: {e}"))
-
-    def process_asset(self, asset, force, dry_run):
-        # Resolve absolute path
-        # Note: asset.file_path is relative to PROJECT_DIR
-        abs_path = (settings.PROJECT_DIR / asset.file_path).resolve()
-        
+                for asset_id, thumb_rel_path, log_lines in results:
+                    for style, message in log_lines:
+                        self.stdout.write(getattr(self.style, style)(message) if style else message)
+
+                    # --- Save to DB ---
+                    if thumb_rel_path and not dry_run:
+                        to_update.append(MediaAsset(id=asset_id, thumbnail_path=thumb_rel_path))
+                        self.stdout.write(self.style.SUCCESS(f"  [OK] ID {asset_id}: Linked {thumb_rel_path}"))
+                        if len(to_update) >= UPDATE_BATCH_SIZE:
+                            MediaAsset.objects.bulk_update(to_update, ['thumbnail_path'])
+                            to_update = []
+            finally:
+                # Links of the thumbnails already built are kept if the run crashes or is interrupted
+                if to_update:
+                    MediaAsset.objects.bulk_update(to_update, ['thumbnail_path'])
+
+
+# -------------------------------------------------------------------------
+# WORKER FUNCTIONS (module level so they can be pickled by ProcessPoolExecutor)
+# -------------------------------------------------------------------------
+def process_asset(asset, project_dir, dry_run):
+    """
+    Builds the thumbnail for one asset dict.
+    Returns (asset_id, thumb_rel_path or None, log_lines) where log_lines is a list
+    of (style_name or None, message) tuples written out by the parent process.
+    """
+    log = []
+    try:
+        # Build absolute path
+        # Note: asset['file_path'] is relative to PROJECT_DIR, which the caller has already resolved
+        abs_path = project_dir / asset['file_path']
+
         if not abs_path.exists():
-            self.stdout.write(self.style.WARNING(f"  [SKIP] ID {asset.id}: Source file not found at {abs_path}"))
-            return
+            log.append(('WARNING', f"  [SKIP] ID {asset['id']}: Source file not found at {abs_path}"))
+            return asset['id'], None, log
 
         thumb_rel_path = None
 
         # --- Dispatch based on Type ---
-        if asset.media_type == MediaAsset.MediaType.VIDEO:
-            thumb_rel_path = self.generate_video_thumb(asset, abs_path, dry_run)
-        
-        elif asset.media_type == MediaAsset.MediaType.IMAGE:
-            thumb_rel_path = self.generate_image_thumb(asset, abs_path, dry_run)
-            
-        elif asset.media_type == MediaAsset.MediaType.IMAGE_SET:
-            thumb_rel_path = self.generate_imageset_thumb(asset, abs_path, dry_run)
-
-        # --- Save to DB ---
-        if thumb_rel_path and not dry_run:
-            asset.thumbnail_path = thumb_rel_path
-            asset.save(update_fields=['thumbnail_path'])
-            self.stdout.write(self.style.SUCCESS(f"  [OK] ID {asset.id}: Linked {thumb_rel_path}"))
-
-    def generate_video_thumb(self, asset, video_path, dry_run):
-        """Extracts a frame from the middle of the video."""
-        # Naming: video.mp4 -> video_thumb.jpg
-        thumb_name = f"{video_path.stem}_thumbnail.jpg"
-        thumb_path = video_path.parent / thumb_name
-        
-        rel_path = str(thumb_path.relative_to(settings.PROJECT_DIR))
-
-        if thumb_path.exists() and not dry_run:
-            return rel_path
-
-        if dry_run:
-            self.stdout.write(f"  [DRY] Video Thumb: {rel_path}")
-            return rel_path
-
-        # Use OpenCV to grab a frame
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            return None
-
-        # Jump to 50% of the video (usually better than 0% which might be black)
-        total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, total_frames * 0.5)
-        
-        ret, frame = cap.read()
-        cap.release()
-
-        if ret:
-            # Resize while maintaining aspect ratio (max width 640)
-            h, w = frame.shape[:2]
-            scale = 640 / float(w)
-            new_dim = (640, int(h * scale))
-            resized = cv2.resize(frame, new_dim, interpolation=cv2.INTER_AREA)
-            
-            # Save as JPG
-            cv2.imwrite(str(thumb_path), resized)
-            return rel_path
+        if asset['media_type'] == MediaAsset.MediaType.VIDEO:
+            duration_sec = None
+            if asset['start_time'] and asset['end_time']:
+                duration_sec = (asset['end_time'] - asset['start_time']).total_seconds()
+            thumb_rel_path = generate_video_thumb(abs_path, project_dir, duration_sec, dry_run, log)
+
+        elif asset['media_type'] == MediaAsset.MediaType.IMAGE:
+            thumb_rel_path = generate_image_thumb(abs_path, project_dir, dry_run, log)
+
+        elif asset['media_type'] == MediaAsset.MediaType.IMAGE_SET:
+            thumb_rel_path = generate_imageset_thumb(abs_path, project_dir, dry_run, log)
+
+        return asset['id'], thumb_rel_path, log
+    except Exception as e:
+        log.append(('ERROR', f"Failed Asset {asset['id']}: {e}"))
+        return asset['id'], None, log
+
+
+def generate_video_thumb(video_path, project_dir, duration_sec, dry_run, log):
+    """Extracts a frame from the middle of the video."""
+    # Naming: video.mp4 -> video_thumb.jpg
+    thumb_name = f"{video_path.stem}_thumbnail.jpg"
+    thumb_path = video_path.parent / thumb_name
+
+    rel_path = str(thumb_path.relative_to(project_dir))
+
+    if thumb_path.exists() and not dry_run:
+        return rel_path
+
+    if dry_run:
+        log.append((None, f"  [DRY] Video Thumb: {rel_path}"))
+        return rel_path
+
+    # Fast path: let ffmpeg seek to the midpoint keyframe (duration comes from the DB,
+    # so the container is never scanned) and scale to 640px wide in one call
+    if duration_sec and duration_sec > 0:
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-ss", f"{duration_sec * 0.5:.3f}",
+            "-i", str(video_path),
+            "-frames:v", "1",
+            "-vf", "scale=640:-2",
+            "-q:v", "3",
+            str(thumb_path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode == 0 and thumb_path.exists():
+                return rel_path
+        except OSError:
+            pass  # ffmpeg not installed, fall back to OpenCV
+
+    # Fallback: use OpenCV to grab a frame
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
         return None
 
-    def generate_image_thumb(self, asset, image_path, dry_run):
-        """Resizes a single image."""
-        thumb_name = f"{image_path.stem}_thumb.jpg"
-        thumb_path = image_path.parent / thumb_name
-        rel_path = str(thumb_path.relative_to(settings.PROJECT_DIR))
+    # Jump to 50% of the video (usually better than 0% which might be black)
+    total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, total_frames * 0.5)
+
+    ret, frame = cap.read()
+    cap.release()
 
-        if dry_run:
-            self.stdout.write(f"  [DRY] Image Thumb: {rel_path}")
-            return rel_path
+    if ret:
+        # Resize while maintaining aspect ratio (max width 640)
+        h, w = frame.shape[:2]
+        scale = 640 / float(w)
+        new_dim = (640, int(h * scale))
+        resized = cv2.resize(frame, new_dim, interpolation=cv2.INTER_AREA)
 
-        self._create_thumb_from_image(image_path, thumb_path)
+        # Save as JPG
+        cv2.imwrite(str(thumb_path), resized)
         return rel_path
+    return None
+
 
-    def generate_imageset_thumb(self, asset, folder_path, dry_run):
-        """Finds the middle image in a set and creates a thumbnail."""
-        thumb_name = "preview_thumbnail.jpg"
-        thumb_path = folder_path / thumb_name
-        
-        # Calculate relative path for DB
-        rel_path = str(thumb_path.relative_to(settings.PROJECT_DIR))
+def generate_image_thumb(image_path, project_dir, dry_run, log):
+    """Resizes a single image."""
+    thumb_name = f"{image_path.stem}_thumb.jpg"
+    thumb_path = image_path.parent / thumb_name
+    rel_path = str(thumb_path.relative_to(project_dir))
 
-        if dry_run:
-            self.stdout.write(f"  [DRY] ImageSet Thumb: {rel_path}")
-            return rel_path
+    if dry_run:
+        log.append((None, f"  [DRY] Image Thumb: {rel_path}"))
+        return rel_path
 
-        # --- OPTIMIZATION START ---
-        # Use os.scandir instead of Path.iterdir for 10x speedup on large folders
-        valid_exts = {'.jpg', '.jpeg', '.png', '.tif', '.tiff'}
-        image_names = []
+    _create_thumb_from_image(image_path, thumb_path, log)
+    return rel_path
 
-        try:
-            with os.scandir(folder_path) as it:
-                for entry in it:
-                    # 'entry' is lightweight; entry.name is just a string
-                    if entry.is_file() and "thumb" not in entry.name:
-                        _, ext = os.path.splitext(entry.name)
-                        if ext.lower() in valid_exts:
-                            image_names.append(entry.name)
-        except OSError as e:
-            self.stdout.write(self.style.ERROR(f"  [ERR] Could not scan {folder_path}: {e}"))
-            return None
-        # --- OPTIMIZATION END ---
-
-        if not image_names:
-            self.stdout.write(self.style.WARNING(f"  [SKIP] No images found in set {folder_path}"))
-            return None
-
-        # Sort strings (very fast)
-        image_names.sort()
-
-        # Pick middle image
-        middle_idx = len(image_names) // 2
-        source_image_name = image_names[middle_idx]
-        
-        # Only construct the full Path object for the ONE image we actually need
-        source_image_path = folder_path / source_image_name
-
-        self._create_thumb_from_image(source_image_path, thumb_path)
+
+def generate_imageset_thumb(folder_path, project_dir, dry_run, log):
+    """Finds the middle image in a set and creates a thumbnail."""
+    thumb_name = "preview_thumbnail.jpg"
+    thumb_path = folder_path / thumb_name
+
+    # Calculate relative path for DB
+    rel_path = str(thumb_path.relative_to(project_dir))
+
+    if dry_run:
+        log.append((None, f"  [DRY] ImageSet Thumb: {rel_path}"))
         return rel_path
 
-    def _create_thumb_from_image(self, source_path, dest_path):
-        """Helper to resize and save using Pillow."""
-        try:
-            with Image.open(source_path) as img:
-                # Convert to RGB (fixes issues with PNG transparency or Tiff)
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Create thumbnail (in-place resize)
-                img.thumbnail((640, 480)) 
-                img.save(dest_path, "JPEG", quality=85)
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error creating thumb from {source_path}: {e}"))
\ No newline at end of file
+    # --- OPTIMIZATION START ---
+    # Use os.scandir instead of Path.iterdir for 10x speedup on large folders
+    valid_exts = {'.jpg', '.jpeg', '.png', '.tif', '.tiff'}
+    image_names = []
+
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                # 'entry' is lightweight; entry.name is just a string
+                if entry.is_file() and "thumb" not in entry.name:
+                    _, ext = os.path.splitext(entry.name)
+                    if ext.lower() in valid_exts:
+                        image_names.append(entry.name)
+    except OSError as e:
+        log.append(('ERROR', f"  [ERR] Could not scan {folder_path}: {e}"))
+        return None
+    # --- OPTIMIZATION END ---
+
+    if not image_names:
+        log.append(('WARNING', f"  [SKIP] No images found in set {folder_path}"))
+        return None
+
+    # Sort strings (very fast)
+    image_names.sort()
+
+    # Pick middle image
+    middle_idx = len(image_names) // 2
+    source_image_name = image_names[middle_idx]
+
+    # Only construct the full Path object for the ONE image we actually need
+    source_image_path = folder_path / source_image_name
+
+    _create_thumb_from_image(source_image_path, thumb_path, log)
+    return rel_path
+
+
+def _create_thumb_from_image(source_path, dest_path, log):
+    """Helper to resize and save using Pillow."""
+    try:
+        with Image.open(source_path) as img:
+            # Let libjpeg decode directly at 1/2, 1/4 or 1/8 scale (no-op for other formats)
+            img.draft('RGB', (640, 480))
+
+            # Convert to RGB (fixes issues with PNG transparency or Tiff)
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+
+            # Create thumbnail (in-place resize)
+            img.thumbnail((640, 480))
+            img.save(dest_path, "JPEG", quality=85)
+    except Exception as e:
+        log.append(('ERROR', f"Error creating thumb from {source_path}: {e}"))
@@ -2,14 +2,36 @@ import os
 import subprocess
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Q
 from missions.models import MediaAsset
 
 logger = logging.getLogger(__name__)
 
+# Frame files are written unpadded (image0.jpg, image1.jpg, ...), so ffmpeg's %d
+# numeric sequence is used rather than -pattern_type glob, which sorts lexically.
+SEQUENCE_RE = re.compile(r'^(image|frame)(\d+)\.(jpg|png)$')
+SEQUENCE_PRIORITY = [('image', 'jpg'), ('image', 'png'), ('frame', 'jpg'), ('frame', 'png')]
+
+# H.264 encoders in order of preference for --encoder auto.
+# Input args go before -i (device setup), output args replace the libx264 defaults.
+ENCODER_PRIORITY = ['h264_nvenc', 'h264_qsv', 'h264_vaapi']
+ENCODER_INPUT_ARGS = {
+    'h264_vaapi': ['-vaapi_device', '/dev/dri/renderD128'],
+}
+ENCODER_OUTPUT_ARGS = {
+    'libx264': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'],
+    'h264_nvenc': ['-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', '23', '-pix_fmt', 'yuv420p'],
+    'h264_qsv': ['-c:v', 'h264_qsv', '-global_quality', '23', '-pix_fmt', 'nv12'],
+    'h264_vaapi': ['-vf', 'format=nv12,hwupload', '-c:v', 'h264_vaapi', '-qp', '23'],
+}
+
+# Threads per ffmpeg process; --jobs defaults to cpu_count // FFMPEG_THREADS
+FFMPEG_THREADS = 2
+
 class Command(BaseCommand):
     help = 'Generates MP4 videos from MediaAsset Image Sets (session_EPOCH.mp4).'
 
@@ -34,12 +56,34 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without running ffmpeg or saving changes.'
         )
+        parser.add_argument(
+            '--encoder',
+            type=str,
+            choices=['auto', 'libx264'] + ENCODER_PRIORITY,
+            default='auto',
+            help='H.264 encoder to use (default: auto picks a hardware encoder if ffmpeg has one, else libx264).'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=max(1, (os.cpu_count() or 1) // FFMPEG_THREADS),
+            help=f'Number of ffmpeg encodes run in parallel, each capped at {FFMPEG_THREADS} threads (default: CPU count / {FFMPEG_THREADS}).'
+        )
 
     def handle(self, *args, **options):
         mission_id = options['mission_id']
         force_fps = options['fps']
         force_regen = options['force']
         is_dry_run = options['dry_run']
+        jobs = max(1, options['jobs'] or 1)
+
+        # Canonicalise the base once; asset paths are joined onto it without another realpath walk
+        self.project_dir = Path(settings.PROJECT_DIR).resolve()
+
+        self.encoder = options['encoder']
+        if self.encoder == 'auto':
+            self.encoder = self.detect_encoder()
+        self.stdout.write(f"Using encoder: {self.encoder}")
 
         # 1. Build Query
         filters = Q(media_type=MediaAsset.MediaType.IMAGE_SET)
@@ -50,23 +94,75 @@ class Command(BaseCommand):
         if not force_regen:
             filters &= (Q(generated_video_path__isnull=True) | Q(generated_video_path=''))
 
-        assets = MediaAsset.objects.filter(filters)
+        # Pull the sensor name in the same query and skip the columns the encode never reads.
+        # Frame counts are annotated here too, so the worker threads never query the DB
+        # (each thread would otherwise open its own connection and leave it open)
+        assets = list(
+            MediaAsset.objects.filter(filters)
+            .select_related('deployment__sensor')
+            .only('id', 'file_path', 'start_time', 'end_time', 'file_metadata', 'deployment__sensor__name')
+            .annotate(frame_total=Count('frames'))
+        )
         
-        self.stdout.write(f"Found {assets.count()} Image Sets to process.")
+        self.stdout.write(f"Found {len(assets)} Image Sets to process.")
+
+        # ffmpeg does the work outside the GIL, so threads are enough to overlap encodes
+        to_update = []
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(lambda asset: self.process_asset(asset, force_fps, is_dry_run), assets)
+            for asset, output_rel_path, log_lines in results:
+                for style, message in log_lines:
+                    self.stdout.write(getattr(self.style, style)(message) if style else message)
 
-        for asset in assets:
-            self.process_asset(asset, force_fps, is_dry_run)
+                if output_rel_path:
+                    asset.generated_video_path = output_rel_path
+                    to_update.append(asset)
+
+        if to_update:
+            MediaAsset.objects.bulk_update(to_update, ['generated_video_path'], batch_size=1000)
+
+    def detect_encoder(self):
+        """Returns the first hardware H.264 encoder compiled into ffmpeg, or libx264."""
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True)
+        except OSError:
+            return 'libx264'
+
+        available = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+        for encoder in ENCODER_PRIORITY:
+            if encoder in available:
+                return encoder
+        return 'libx264'
+
+    def build_ffmpeg_cmd(self, encoder, fps, start_number, input_pattern, output_path):
+        return [
+            "ffmpeg",
+            "-y",
+            *ENCODER_INPUT_ARGS.get(encoder, []),
+            "-framerate", str(fps),
+            "-start_number", str(start_number),
+            "-i", str(input_pattern),
+            *ENCODER_OUTPUT_ARGS[encoder],
+            "-threads", str(FFMPEG_THREADS),
+            str(output_path)
+        ]
 
     def process_asset(self, asset, force_fps, is_dry_run):
+        """
+        Builds the video for one asset; runs in a worker thread.
+        Returns (asset, output_rel_path or None, log_lines) where log_lines is a list
+        of (style_name or None, message) tuples written out by the main thread.
+        """
+        log = []
         try:
-            # Resolve Base Path
-            base_dir = (settings.PROJECT_DIR / asset.file_path).resolve()
+            # Base Path (project_dir is already resolved)
+            base_dir = self.project_dir / asset.file_path
 
             if not base_dir.exists():
-                self.stdout.write(self.style.ERROR(f"  [SKIP] Folder not found: {base_dir}"))
-                return
+                log.append(('ERROR', f"  [SKIP] Folder not found: {base_dir}"))
+                return asset, None, log
 
-            self.stdout.write(f"--> Processing Asset {asset.id} ({asset.deployment.sensor.name})")
+            log.append((None, f"--> Processing Asset {asset.id} ({asset.deployment.sensor.name})"))
 
             # ---------------------------------------------------------
             # 1. GENERATE UNIQUE FILENAME (session_EPOCH.mp4)
@@ -76,7 +172,7 @@ class Command(BaseCommand):
             output_filename = f"session_{epoch_ts}.mp4"
             
             output_full_path = base_dir / output_filename
-            output_rel_path = str(output_full_path.relative_to(settings.PROJECT_DIR))
+            output_rel_path = str(output_full_path.relative_to(self.project_dir))
 
             # ---------------------------------------------------------
             # 2. LOCATE IMAGES
@@ -87,16 +183,18 @@ class Command(BaseCommand):
             
             def has_images(path):
                 if not path.is_dir(): return False
-                return any(f.name.endswith(('.jpg', '.png')) for f in path.iterdir() if f.is_file())
+                # os.scandir serves is_file() from the cached dirent, no extra stat per entry
+                with os.scandir(path) as it:
+                    return any(e.is_file() and e.name.endswith(('.jpg', '.png')) for e in it)
 
             if has_images(base_dir):
                 image_dir = base_dir
             elif (base_dir / "images").exists() and has_images(base_dir / "images"):
                 image_dir = base_dir / "images"
-                self.stdout.write(f"     Found images in 'images/' subfolder.")
+                log.append((None, f"     Found images in 'images/' subfolder."))
             else:
-                self.stdout.write(self.style.WARNING("     [SKIP] No images found in folder."))
-                return
+                log.append(('WARNING', "     [SKIP] No images found in folder."))
+                return asset, None, log
 
             # ---------------------------------------------------------
             # 3. DETERMINE FRAMERATE
@@ -111,72 +209,68 @@ class Command(BaseCommand):
                 
                 frame_count = asset.file_metadata.get('image_count', 0)
                 if not frame_count:
-                    frame_count = asset.frames.count()
+                    frame_count = asset.frame_total
 
                 if duration_sec > 0 and frame_count > 0:
                     fps = frame_count / duration_sec
                     if fps > 60: fps = 30.0
                 
-            self.stdout.write(f"     Target FPS: {fps:.2f}")
+            log.append((None, f"     Target FPS: {fps:.2f}"))
 
             # ---------------------------------------------------------
             # 4. DETECT PATTERN & START NUMBER
             # ---------------------------------------------------------
-            files = sorted([f.name for f in image_dir.iterdir() if f.is_file()])
+            # Single directory pass: remember the lowest frame number per (prefix, ext)
+            # instead of sorting every name and rescanning the listing per candidate.
+            start_numbers = {}
+            with os.scandir(image_dir) as it:
+                for entry in it:
+                    match = SEQUENCE_RE.match(entry.name)
+                    if match and entry.is_file():
+                        key = (match.group(1), match.group(3))
+                        number = int(match.group(2))
+                        if key not in start_numbers or number < start_numbers[key]:
+                            start_numbers[key] = number
+
             pattern = None
             start_number = 0
-            
-            def get_start_number(prefix, ext):
-                for fname in files:
-                    if fname.startswith(prefix) and fname.endswith(ext):
-                        match = re.search(r'(\d+)', fname)
-                        if match: return int(match.group(1))
-                return 0
-
-            if any(f.startswith("image") and f.endswith(".jpg") for f in files[:5]):
-                pattern = "image%d.jpg"
-                start_number = get_start_number("image", ".jpg")
-            elif any(f.startswith("image") and f.endswith(".png") for f in files[:5]):
-                pattern = "image%d.png"
-                start_number = get_start_number("image", ".png")
-            elif any(f.startswith("frame") and f.endswith(".jpg") for f in files[:5]):
-                pattern = "frame%d.jpg"
-                start_number = get_start_number("frame", ".jpg")
-            elif any(f.startswith("frame") and f.endswith(".png") for f in files[:5]):
-                pattern = "frame%d.png"
-                start_number = get_start_number("frame", ".png")
+            for prefix, ext in SEQUENCE_PRIORITY:
+                if (prefix, ext) in start_numbers:
+                    pattern = f"{prefix}%d.{ext}"
+                    start_number = start_numbers[(prefix, ext)]
+                    break
             
             if not pattern:
-                self.stdout.write(self.style.WARNING("     [SKIP] Could not detect valid image sequence pattern."))
-                return
+                log.append(('WARNING', "     [SKIP] Could not detect valid image sequence pattern."))
+                return asset, None, log
 
             # ---------------------------------------------------------
             # 5. RUN FFMPEG
             # ---------------------------------------------------------
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-framerate", str(fps),
-                "-start_number", str(start_number),
-                "-i", str(image_dir / pattern),
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                str(output_full_path)
-            ]
+            # self.encoder is shared by the worker threads and only read; a fallback stays local to this asset
+            encoder = self.encoder
+            cmd = self.build_ffmpeg_cmd(encoder, fps, start_number, image_dir / pattern, output_full_path)
 
             if is_dry_run:
-                self.stdout.write(f"     [DRY] Output: {output_full_path.name}")
-                self.stdout.write(f"     [DRY] Command: {' '.join(cmd)}")
+                log.append((None, f"     [DRY] Output: {output_full_path.name}"))
+                log.append((None, f"     [DRY] Command: {' '.join(cmd)}"))
             else:
-                self.stdout.write(f"     Generating {output_full_path.name}...")
+                log.append((None, f"     Generating {output_full_path.name}..."))
                 result = subprocess.run(cmd, capture_output=True, text=True)
-                
+
+                # An encoder can be compiled in without a usable device behind it
+                # (or run out of sessions under parallel jobs); retry this asset on the CPU
+                if result.returncode != 0 and encoder != 'libx264':
+                    log.append(('WARNING', f"     [WARN] {encoder} failed, falling back to libx264."))
+                    encoder = 'libx264'
+                    cmd = self.build_ffmpeg_cmd(encoder, fps, start_number, image_dir / pattern, output_full_path)
+                    result = subprocess.run(cmd, capture_output=True, text=True)
+
                 if result.returncode == 0:
-                    asset.generated_video_path = output_rel_path
-                    asset.save(update_fields=['generated_video_path'])
-                    self.stdout.write(self.style.SUCCESS(f"     [OK] Video created."))
-                else:
-                    self.stdout.write(self.style.ERROR(f"     [FAIL] FFmpeg error: {result.stderr}"))
+                    log.append(('SUCCESS', f"     [OK] Video created."))
+                    return asset, output_rel_path, log
+                log.append(('ERROR', f"     [FAIL] FFmpeg error: {result.stderr}"))
 
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"     [ERR] Unexpected error: {e}"))
\ No newline at end of file
+            log.append(('ERROR', f"     [ERR] Unexpected error: {e}"))
+        return asset, None, log
\ No newline at end of file
@@ -1,20 +1,34 @@
 import os
 import re
+import json
+import subprocess
 import logging
 import cv2  # pip install opencv-python
+import numpy as np
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from bisect import bisect_left
+from bisect import bisect_right
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
+from django.db.models.functions import Coalesce
 
-from missions.models import Mission, Sensor, SensorDeployment, MediaAsset, FrameIndex, NavSample
+from missions.models import Mission, SensorDeployment, MediaAsset, FrameIndex, NavSample
+from missions.management.commands._frameindex import UTC, EPOCH, ONE_US, match_nav, insert_frames
 
 logger = logging.getLogger(__name__)
 
+# Epoch / frame number extraction from file and folder names
+MAIN_REC_RE = re.compile(r'main_rec_(\d+)')
+SONAR_FRAME_RE = re.compile(r'frame(\d+)\.txt')
+SESSION_RE = re.compile(r'session_(\d+)')
+
+# Threads used to read the per-frame sonar raw files
+SONAR_READ_WORKERS = 16
+
 class Command(BaseCommand):
     help = 'Imports V2 Session Data (Epoch timestamps). MAKE SURE MISSION, LOGS and SENSORDEPLOYMENTS ARE ALREADY CREATED.'
 
@@ -33,6 +47,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.data_root = Path(options['data_root']).resolve()
+        # data_root is canonical, so every path found under it can be made relative without resolving again
+        self.project_root = settings.PROJECT_DIR.resolve()
         self.is_dry_run = options.get('dry_run', False)
 
         if not self.data_root.exists():
@@ -40,7 +56,11 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Scanning Root: {self.data_root.name}")
 
-        mission_dirs = sorted([d for d in self.data_root.iterdir() if d.is_dir() and d.name.startswith("mission")])
+        mission_dirs = self._scan_dir(self.data_root, prefix="mission", dirs=True)
+
+        # Load the mission time ranges once; each mission folder is then matched in memory
+        self.missions = list(Mission.objects.order_by('start_time').only('id', 'start_time', 'end_time'))
+        self.mission_starts = [m.start_time for m in self.missions]
 
         if not mission_dirs:
             self.stdout.write(self.style.WARNING(f"No 'mission*' folders found in {self.data_root}"))
@@ -52,7 +72,7 @@ class Command(BaseCommand):
     def process_mission_folder(self, mission_dir):
         self.stdout.write(self.style.SUCCESS(f"\nScanning Mission Folder: {mission_dir.name}"))
         
-        session_dirs = sorted([d for d in mission_dir.iterdir() if d.is_dir() and d.name.startswith("session")])
+        session_dirs = self._scan_dir(mission_dir, prefix="session", dirs=True)
         if not session_dirs:
             self.stdout.write("  No sessions found.")
             return
@@ -70,10 +90,37 @@ class Command(BaseCommand):
 
         self.stdout.write(f"  -> Linked to Mission ID: {mission.id} ({mission.start_time})")
         
+        # Resolve every deployment of this mission once instead of per session/importer
+        self.deployments = {
+            (d.sensor.name, d.instance): d
+            for d in SensorDeployment.objects.filter(mission=mission).select_related('sensor')
+        }
+
+        # Existing assets of this mission, so re-imports update in place without a lookup per asset
+        self.existing_assets = {}
+        for asset in MediaAsset.objects.filter(deployment__mission=mission).only('id', 'deployment_id', 'file_path', 'media_type', 'start_time', 'end_time', 'file_metadata'):
+            self.existing_assets.setdefault((asset.deployment_id, asset.file_path, asset.media_type), asset)
+
         # 2. Pre-load Nav Samples
-        nav_samples = list(NavSample.objects.filter(mission=mission).order_by('timestamp').values('id', 'timestamp'))
-        nav_timestamps = [n['timestamp'] for n in nav_samples]
-        nav_ids = [n['id'] for n in nav_samples]
+        # (depth follows MediaAsset.calculate_stats: corrected depth, else raw depth)
+        # Streamed as tuples straight into three columns, no per-row dicts
+        nav_ids, nav_us, nav_depths = [], [], []
+        rows = (
+            NavSample.objects.filter(mission=mission).order_by('timestamp')
+            .annotate(depth=Coalesce('corrected_depth_m', 'depth_m'))
+            .values_list('id', 'timestamp', 'depth')
+            .iterator(chunk_size=50000)
+        )
+        for n_id, ts, depth in rows:
+            nav_ids.append(n_id)
+            nav_us.append((ts - EPOCH) // ONE_US)
+            nav_depths.append(depth)
+        # Built once per mission and shared read-only by every importer
+        nav = {
+            'us': np.array(nav_us, dtype=np.int64),
+            'ids': np.array(nav_ids, dtype=np.int64),
+            'depths': np.array(nav_depths, dtype=np.float64),  # None -> nan
+        }
 
         # 3. Process Each Session
         for s_dir in session_dirs:
@@ -83,24 +130,27 @@ class Command(BaseCommand):
             session_dt = self.extract_reference_timestamp(s_dir)
 
             # --- IMPORTERS ---
-            self.import_camera_0(mission, s_dir / "camera_0", session_dt, nav_timestamps, nav_ids)
-            self.import_camera_1(mission, s_dir / "camera_1", nav_timestamps, nav_ids)
-            self.import_sonar(mission, s_dir / "sonar", nav_timestamps, nav_ids)
+            self.import_camera_0(mission, s_dir / "camera_0", session_dt, nav)
+            self.import_camera_1(mission, s_dir / "camera_1", nav)
+            self.import_sonar(mission, s_dir / "sonar", nav)
 
     # -------------------------------------------------------------------------
     # 1. CAMERA 0 IMPORTER (Robust Manual Scan)
     # -------------------------------------------------------------------------
-    def import_camera_0(self, mission, folder, session_start_time, nav_ts, nav_ids):
+    def import_camera_0(self, mission, folder, session_start_time, nav):
         if not folder.exists(): return
 
-        video_files = list(folder.glob("main_rec_*.mkv")) + list(folder.glob("main_rec_*.mp4"))
+        video_files = (
+            self._scan_dir(folder, prefix="main_rec_", suffixes=(".mkv",)) +
+            self._scan_dir(folder, prefix="main_rec_", suffixes=(".mp4",))
+        )
         if not video_files: return
 
         video_path = video_files[0]
         
         # 1. Determine Start Time
         start_time_utc = None
-        match = re.search(r'main_rec_(\d+)', video_path.name)
+        match = MAIN_REC_RE.search(video_path.name)
         
         if match:
             epoch_ts = int(match.group(1))
@@ -117,60 +167,86 @@ class Command(BaseCommand):
         end_time_utc = None
         video_fps = None
         total_frames = 0
-        
+
+        # Size and mtime identify the file contents; the name (and so start_time) can't
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            if not cap.isOpened():
-                self.stdout.write(self.style.ERROR(f"    [CV2] Error: Could not open video file {video_path}"))
-            else:
-                header_fps = cap.get(cv2.CAP_PROP_FPS)
-                header_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-
-                # FAST PATH
-                if header_fps > 0 and header_count > 0:
-                     duration_sec = header_count / header_fps
-                     end_time_utc = start_time_utc + timedelta(seconds=duration_sec)
-                     video_fps = header_fps
-                     total_frames = int(header_count)
-                     self.stdout.write(f"    [CV2] Metadata Valid: {duration_sec:.2f}s (FPS: {video_fps:.2f}, Frames: {total_frames})")
-                
-                # SLOW PATH
+            file_stat = video_path.stat()
+            file_id = {'st_size': file_stat.st_size, 'st_mtime_ns': file_stat.st_mtime_ns}
+        except OSError:
+            file_id = {}
+
+        # Re-import of an unchanged video: reuse what the last probe stored on the asset
+        cached = self._cached_video_probe(video_path, start_time_utc, file_id)
+        if cached:
+            end_time_utc, video_fps, total_frames = cached
+            self.stdout.write(f"    [INFO] Cam0: {video_path.name} unchanged, skipping probe ({total_frames} frames).")
+        else:
+            try:
+                # Header probe only: pin the FFmpeg backend and a single decoder thread so no
+                # thread pool is spun up per file; fall back to auto backend selection
+                cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG, [cv2.CAP_PROP_N_THREADS, 1])
+                if not cap.isOpened():
+                    cap = cv2.VideoCapture(str(video_path))
+                if not cap.isOpened():
+                    self.stdout.write(self.style.ERROR(f"    [CV2] Error: Could not open video file {video_path}"))
                 else:
-                    self.stdout.write(self.style.WARNING(f"    [CV2] Invalid Metadata. Deep scanning..."))
-                    real_fps = header_fps if header_fps > 0 else 30.0
-                    frame_count = 0
-                    while True:
-                        ret = cap.grab()
-                        if not ret: break
-
-                        last_timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
-                        frame_count += 1
-                        if frame_count % 1000 == 0:
-                            print(f"\r    [CV2] Scanned {frame_count} frames...", end="", flush=True)
-
-                    print(f"\r    [CV2] Scan Complete. Found {frame_count} frames.           ")
+                    header_fps = cap.get(cv2.CAP_PROP_FPS)
+                    header_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+
+                    # FAST PATH
+                    if header_fps > 0 and header_count > 0:
+                         duration_sec = header_count / header_fps
+                         end_time_utc = start_time_utc + timedelta(seconds=duration_sec)
+                         video_fps = header_fps
+                         total_frames = int(header_count)
+                         self.stdout.write(f"    [CV2] Metadata Valid: {duration_sec:.2f}s (FPS: {video_fps:.2f}, Frames: {total_frames})")
+                
+                    # SLOW PATH
+                    else:
+                        self.stdout.write(self.style.WARNING(f"    [CV2] Invalid Metadata. Deep scanning..."))
+                        real_fps = header_fps if header_fps > 0 else 30.0
+                        frame_count = 0
+                        last_timestamp_ms = 0
+
+                        # Let ffprobe count packets in one C-level pass; the grab loop is only the fallback
+                        probed = self._ffprobe_count_frames(video_path)
+                        if probed:
+                            frame_count, duration_sec = probed
+                            last_timestamp_ms = duration_sec * 1000.0
+                            self.stdout.write(f"    [FFPROBE] Scan Complete. Found {frame_count} frames.")
+                        else:
+                            while True:
+                                ret = cap.grab()
+                                if not ret: break
+
+                                last_timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                                frame_count += 1
+                                if frame_count % 1000 == 0:
+                                    print(f"\r    [CV2] Scanned {frame_count} frames...", end="", flush=True)
+
+                            print(f"\r    [CV2] Scan Complete. Found {frame_count} frames.           ")
                     
-                    if frame_count > 0:
-                        # Use the timestamp from the last valid frame (most accurate)
-                        duration_ms = last_timestamp_ms
-                        if duration_ms <= 0:
-                            duration_ms = (frame_count / real_fps) * 1000.0
+                        if frame_count > 0:
+                            # Use the timestamp from the last valid frame (most accurate)
+                            duration_ms = last_timestamp_ms
+                            if duration_ms <= 0:
+                                duration_ms = (frame_count / real_fps) * 1000.0
                         
-                        duration_sec = duration_ms / 1000.0
-                        end_time_utc = start_time_utc + timedelta(seconds=duration_sec)
+                            duration_sec = duration_ms / 1000.0
+                            end_time_utc = start_time_utc + timedelta(seconds=duration_sec)
                         
-                        # --- FIX: Recalculate FPS to match observations ---
-                        # Ensures frames fit exactly into the duration without drift
-                        if duration_sec > 0:
-                            video_fps = frame_count / duration_sec
-                        else:
-                            video_fps = real_fps
-                        total_frames = frame_count
-                        self.stdout.write(f"    [CV2] Deep Scan Duration: {duration_sec:.2f}s")
-
-                cap.release()
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"    [CV2] Error probing video: {e}"))
+                            # --- FIX: Recalculate FPS to match observations ---
+                            # Ensures frames fit exactly into the duration without drift
+                            if duration_sec > 0:
+                                video_fps = frame_count / duration_sec
+                            else:
+                                video_fps = real_fps
+                            total_frames = frame_count
+                            self.stdout.write(f"    [CV2] Deep Scan Duration: {duration_sec:.2f}s")
+
+                    cap.release()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"    [CV2] Error probing video: {e}"))
 
         if not end_time_utc:
             end_time_utc = mission.end_time or (start_time_utc + timedelta(minutes=1))
@@ -181,19 +257,29 @@ class Command(BaseCommand):
 
         # 3. Save Asset
         try:
-            sensor = Sensor.objects.get(name="BR_LowLightCamera")
-            deployment = SensorDeployment.objects.get(mission=mission, sensor=sensor, instance=0)
-            rel_path = str(video_path.resolve().relative_to(settings.PROJECT_DIR.resolve()))
+            deployment = self.deployments.get(("BR_LowLightCamera", 0))
+            if deployment is None:
+                self.stdout.write(self.style.ERROR("    [ERR] Sensor 'BR_LowLightCamera' has no deployment (instance 0) for this mission."))
+                return
+            rel_path = str(video_path.relative_to(self.project_root))
+
+            # Merge into the stored metadata so keys written elsewhere are kept
+            existing = self.existing_assets.get((deployment.id, rel_path, MediaAsset.MediaType.VIDEO))
+            file_metadata = dict(existing.file_metadata or {}) if existing else {}
+            # A stale file identity must not survive a probe that couldn't stat the file
+            for key in ('st_size', 'st_mtime_ns'):
+                file_metadata.pop(key, None)
+            # Unrounded probe results plus the file identity, so an unchanged re-import can skip cv2
+            file_metadata.update({'total_frames': total_frames, 'fps': video_fps, **file_id})
             
             with transaction.atomic():
-                asset, _ = MediaAsset.objects.update_or_create(
-                    deployment=deployment,
-                    file_path=rel_path,
-                    media_type=MediaAsset.MediaType.VIDEO,
-                    defaults={
+                asset = self._upsert_asset(
+                    deployment, rel_path, MediaAsset.MediaType.VIDEO,
+                    {
                         'start_time': start_time_utc,
                         'end_time': end_time_utc,
                         'fps': video_fps,
+                        'file_metadata': file_metadata,
                         'notes': "Imported from BR_LowLightCamera (V2)"
                     }
                 )
@@ -202,58 +288,36 @@ class Command(BaseCommand):
                 if video_fps and total_frames > 0:
                     FrameIndex.objects.filter(media_asset=asset).delete()
                     
-                    batch = []
-                    nav_len = len(nav_ts)
                     frame_interval = 1.0 / float(video_fps)
 
-                    for i in range(total_frames):
-                        # Calculate exact timestamp for this frame index
-                        # timestamp = start + (frame_num * interval)
-                        f_ts = start_time_utc + timedelta(seconds=i * frame_interval)
-                        
-                        # Binary Search for Nav Link (Same logic as Camera 1 / Sonar)
-                        closest_id = None
-                        diff = None
-                        if nav_len > 0:
-                            pos = bisect_left(nav_ts, f_ts)
-                            idx = pos if pos < nav_len else nav_len - 1
-                            if pos > 0:
-                                before = nav_ts[pos-1]
-                                after = nav_ts[min(pos, nav_len-1)]
-                                if abs((f_ts - before).total_seconds()) <= abs((after - f_ts).total_seconds()):
-                                    idx = pos - 1
-                            
-                            closest_id = nav_ids[idx]
-                            diff = int(abs((f_ts - nav_ts[idx]).total_seconds()) * 1000)
-
-                        batch.append(FrameIndex(
-                            media_asset=asset,
-                            frame_number=i,
-                            timestamp=f_ts,
-                            closest_nav_sample_id=closest_id,
-                            nav_match_time_diff_ms=diff
-                        ))
-
-                        if len(batch) >= 2000:
-                            FrameIndex.objects.bulk_create(batch, batch_size=2000)
-                            batch = []
-
-                    if batch:
-                        FrameIndex.objects.bulk_create(batch, batch_size=2000)
-                        self.stdout.write("    [STAT] Calculating depth stats...")
-                        asset.calculate_stats()
+                    # Frame offsets from the start, in integer microseconds
+                    # timestamp = start + (frame_num * interval)
+                    offsets_us = np.round(np.arange(total_frames) * frame_interval * 1e6).astype(np.int64)
+                    frame_us = (start_time_utc - EPOCH) // ONE_US + offsets_us
+                    # Epoch seconds are exact to the microsecond in float64 at these magnitudes
+                    frame_secs = (frame_us / 1e6).tolist()
+
+                    # Nav Link for every frame in one vectorized pass
+                    closest_ids, diffs, closest_idx = self._link_frames(frame_us, nav)
+
+                    def frames():
+                        for i in range(total_frames):
+                            f_ts = datetime.fromtimestamp(frame_secs[i], UTC)
+                            yield i, f_ts, closest_ids[i], diffs[i]
+
+                    insert_frames(asset.id, frames())
+                    self.stdout.write("    [STAT] Calculating depth stats...")
+                    self._save_depth_stats(asset, nav, closest_idx)
                     
                     self.stdout.write(f"    [OK] Cam0: Saved Asset + {total_frames} FrameIndex records.")
 
-        except Sensor.DoesNotExist:
-            self.stdout.write(self.style.ERROR("    [ERR] Sensor 'BR_LowLightCamera' not found in DB."))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"    [ERR] Cam0 Import Failed: {e}"))
 
     # -------------------------------------------------------------------------
     # 2. CAMERA 1 IMPORTER
     # -------------------------------------------------------------------------
-    def import_camera_1(self, mission, folder, nav_ts, nav_ids):
+    def import_camera_1(self, mission, folder, nav):
         if not folder.exists(): return
 
         ts_file = folder / "timestamps.txt"
@@ -267,29 +331,40 @@ class Command(BaseCommand):
 
         frame_data = []
         try:
-            with open(ts_file, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 2:
-                        try:
-                            f_num = int(parts[0].replace('image', ''))
-                            dt = datetime.fromtimestamp(int(parts[1]) / 1000.0, tz=timezone.utc)
-                            frame_data.append((f_num, dt))
-                        except ValueError:
-                            continue
+            try:
+                # Fast path: parse both columns in C ("image<N> <epoch_ms>" per line)
+                columns = np.loadtxt(ts_file, dtype=str, usecols=(0, 1), ndmin=2)
+                f_nums = np.char.replace(columns[:, 0], 'image', '').astype(np.int64)
+                ts_ms = columns[:, 1].astype(np.int64)
+                frame_data = [
+                    (f_num, datetime.fromtimestamp(ms / 1000.0, UTC))
+                    for f_num, ms in zip(f_nums.tolist(), ts_ms.tolist())
+                ]
+            except ValueError:
+                # Malformed lines: fall back to the tolerant line-by-line parse
+                with open(ts_file, 'r') as f:
+                    for line in f:
+                        parts = line.strip().split()
+                        if len(parts) >= 2:
+                            try:
+                                f_num = int(parts[0].replace('image', ''))
+                                dt = datetime.fromtimestamp(int(parts[1]) / 1000.0, UTC)
+                                frame_data.append((f_num, dt))
+                            except ValueError:
+                                continue
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"    [ERR] Cam1: Error reading timestamps: {e}"))
             return
 
         if frame_data:
             self._save_asset_sequence(
-                mission, "Panasonic_BGH1", 1, target_path, frame_data, nav_ts, nav_ids, "Camera 1"
+                mission, "Panasonic_BGH1", 1, target_path, frame_data, nav, "Camera 1"
             )
 
     # -------------------------------------------------------------------------
     # 3. SONAR IMPORTER
     # -------------------------------------------------------------------------
-    def import_sonar(self, mission, folder, nav_ts, nav_ids):
+    def import_sonar(self, mission, folder, nav):
         if not folder.exists(): return
 
         raw_dir = folder / "raw"
@@ -297,35 +372,24 @@ class Command(BaseCommand):
         
         if not raw_dir.exists(): return
 
-        raw_files = sorted(list(raw_dir.glob("*.txt"))) 
+        raw_files = self._scan_dir(raw_dir, suffixes=(".txt",))
         if not raw_files: return
 
-        frame_data = []
-        for rf in raw_files:
-            match = re.search(r'frame(\d+)\.txt', rf.name)
-            if match:
-                f_num = int(match.group(1))
-                try:
-                    with open(rf, 'r') as f:
-                        line = f.readline().strip()
-                        parts = line.strip().split()
-                        if len(parts) >= 2:
-                            dt = datetime.fromtimestamp(int(parts[1]) / 1000.0, tz=timezone.utc)
-                            frame_data.append((f_num, dt))
-                except Exception:
-                    continue
+        # Thousands of tiny files: overlap the open/read latency across threads
+        with ThreadPoolExecutor(max_workers=SONAR_READ_WORKERS) as executor:
+            frame_data = [row for row in executor.map(_parse_sonar_row, raw_files) if row]
         
         if frame_data:
             target_path = images_dir if images_dir.exists() else folder
             self._save_asset_sequence(
-                mission, "SonoptixECHO", 0, target_path, frame_data, nav_ts, nav_ids, "Sonar"
+                mission, "SonoptixECHO", 0, target_path, frame_data, nav, "Sonar"
             )
 
     # -------------------------------------------------------------------------
     # SHARED UTILS
     # -------------------------------------------------------------------------
-    def _save_asset_sequence(self, mission, sensor_name, instance, folder_path, frame_data, nav_ts, nav_ids, label):
-        frame_data.sort(key=lambda x: x[0])
+    def _save_asset_sequence(self, mission, sensor_name, instance, folder_path, frame_data, nav, label):
+        frame_data.sort(key=itemgetter(0))
         start = frame_data[0][1]
         end = frame_data[-1][1]
         count = len(frame_data)
@@ -335,21 +399,17 @@ class Command(BaseCommand):
             return
 
         try:
-            try:
-                sensor = Sensor.objects.get(name=sensor_name)
-                deployment = SensorDeployment.objects.get(mission=mission, sensor=sensor, instance=instance)
-            except (Sensor.DoesNotExist, SensorDeployment.DoesNotExist):
+            deployment = self.deployments.get((sensor_name, instance))
+            if deployment is None:
                 self.stdout.write(self.style.WARNING(f"    [SKIP] {label}: Sensor or Deployment not found."))
                 return
             
-            rel_path = str(folder_path.resolve().relative_to(settings.PROJECT_DIR.resolve()))
+            rel_path = str(folder_path.relative_to(self.project_root))
 
             with transaction.atomic():
-                asset, _ = MediaAsset.objects.update_or_create(
-                    deployment=deployment,
-                    file_path=rel_path,
-                    media_type=MediaAsset.MediaType.IMAGE_SET,
-                    defaults={
+                asset = self._upsert_asset(
+                    deployment, rel_path, MediaAsset.MediaType.IMAGE_SET,
+                    {
                         'start_time': start,
                         'end_time': end,
                         'file_metadata': {'image_count': count},
@@ -358,39 +418,144 @@ class Command(BaseCommand):
                 )
 
                 FrameIndex.objects.filter(media_asset=asset).delete()
-                batch = []
-                nav_len = len(nav_ts)
-
-                for f_num, f_ts in frame_data:
-                    closest_id = None
-                    diff = None
-                    if nav_len > 0:
-                        pos = bisect_left(nav_ts, f_ts)
-                        idx = pos if pos < nav_len else nav_len - 1
-                        if pos > 0:
-                            before = nav_ts[pos-1]
-                            after = nav_ts[min(pos, nav_len-1)]
-                            if abs((f_ts - before).total_seconds()) <= abs((after - f_ts).total_seconds()):
-                                idx = pos - 1
-                        
-                        closest_id = nav_ids[idx]
-                        diff = int(abs((f_ts - nav_ts[idx]).total_seconds()) * 1000)
+                frame_us = np.array([(f_ts - EPOCH) // ONE_US for _, f_ts in frame_data], dtype=np.int64)
+                closest_ids, diffs, closest_idx = self._link_frames(frame_us, nav)
 
-                    batch.append(FrameIndex(
-                        media_asset=asset, frame_number=f_num, timestamp=f_ts,
-                        closest_nav_sample_id=closest_id, nav_match_time_diff_ms=diff
-                    ))
-                
-                FrameIndex.objects.bulk_create(batch, batch_size=2000)
+                insert_frames(asset.id, (
+                    (f_num, f_ts, closest_id, diff)
+                    for (f_num, f_ts), closest_id, diff in zip(frame_data, closest_ids, diffs)
+                ))
 
-                # Calculate min/max depth now that frames exist
-                asset.calculate_stats()
+                # Min/max depth of the linked nav samples, without re-reading the frames
+                self._save_depth_stats(asset, nav, closest_idx)
                 
                 self.stdout.write(f"    [OK] {label}: Saved {count} frames.")
         
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"    [ERR] {label} Failed: {e}"))
 
+    def _ffprobe_count_frames(self, video_path):
+        """
+        Returns (packet_count, duration_sec) for the first video stream using ffprobe,
+        or None if ffprobe is unavailable or cannot read the file.
+        """
+        cmd = [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-count_packets",
+            "-show_entries", "stream=nb_read_packets,duration:format=duration",
+            "-of", "json",
+            str(video_path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+
+        try:
+            info = json.loads(result.stdout)
+            stream = info['streams'][0]
+            packets = int(stream['nb_read_packets'])
+            # MKV usually only carries the container duration
+            duration = stream.get('duration') or info.get('format', {}).get('duration')
+            duration_sec = float(duration)
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+        if packets <= 0 or duration_sec <= 0:
+            return None
+        return packets, duration_sec
+
+    def _cached_video_probe(self, video_path, start_time_utc, file_id):
+        """
+        (end_time, fps, total_frames) stored on the existing Camera 0 asset for this
+        file, or None if there is no asset yet, its start time no longer matches, or the
+        file's size/mtime (file_id) differ from the ones recorded at the last probe.
+        """
+        if not file_id:
+            return None
+        deployment = self.deployments.get(("BR_LowLightCamera", 0))
+        if deployment is None:
+            return None
+        try:
+            rel_path = str(video_path.relative_to(self.project_root))
+        except ValueError:
+            return None
+
+        asset = self.existing_assets.get((deployment.id, rel_path, MediaAsset.MediaType.VIDEO))
+        if asset is None or asset.start_time != start_time_utc or not asset.end_time:
+            return None
+        meta = asset.file_metadata or {}
+        if not meta.get('fps') or not meta.get('total_frames'):
+            return None
+        # Replaced or re-encoded under the same name: probe again
+        if any(meta.get(key) != value for key, value in file_id.items()):
+            return None
+        return asset.end_time, meta['fps'], meta['total_frames']
+
+    def _upsert_asset(self, deployment, rel_path, media_type, defaults):
+        """
+        Equivalent of MediaAsset.objects.update_or_create(deployment, file_path, media_type, defaults)
+        backed by the mission's preloaded assets: one UPDATE or one INSERT, no SELECT.
+        """
+        key = (deployment.id, rel_path, media_type)
+        asset = self.existing_assets.get(key)
+        if asset is None:
+            asset = MediaAsset.objects.create(
+                deployment=deployment, file_path=rel_path, media_type=media_type, **defaults
+            )
+            self.existing_assets[key] = asset
+        else:
+            for field, value in defaults.items():
+                setattr(asset, field, value)
+            asset.save(update_fields=list(defaults))
+        return asset
+
+    def _link_frames(self, frame_us, nav):
+        """
+        Links frames (int64 epoch microseconds) to their nearest nav sample.
+        Returns (closest nav sample ids, time differences in ms, indices into the nav arrays)
+        as lists plus the index array; ids/diffs are all None when the mission has no nav data.
+        """
+        if not len(nav['us']):
+            return [None] * len(frame_us), [None] * len(frame_us), None
+        idx, diffs_ms = match_nav(frame_us, nav['us'])
+        return nav['ids'][idx].tolist(), diffs_ms.tolist(), idx
+
+    def _save_depth_stats(self, asset, nav, nav_indices):
+        """
+        Sets min/max depth on `asset` from the nav samples its frames were linked to
+        (indices into this mission's nav arrays). Same result as MediaAsset.calculate_stats,
+        but computed from the arrays already in memory instead of aggregating over FrameIndex.
+        """
+        depths = nav['depths'][nav_indices] if nav_indices is not None else np.empty(0)
+        depths = depths[~np.isnan(depths)]
+        asset.min_depth_m = float(depths.min()) if depths.size else None
+        asset.max_depth_m = float(depths.max()) if depths.size else None
+        asset.save(update_fields=['min_depth_m', 'max_depth_m'])
+
+    def _scan_dir(self, path, prefix="", suffixes=(), dirs=False):
+        """
+        Returns the sorted child paths of `path` whose names match prefix/suffixes.
+        os.scandir serves is_dir()/is_file() from the directory entry, so there is
+        no extra stat() per child. A missing directory yields an empty list (like glob).
+        """
+        names = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not entry.name.startswith(prefix):
+                        continue
+                    if suffixes and not entry.name.endswith(suffixes):
+                        continue
+                    if entry.is_dir() if dirs else entry.is_file():
+                        names.append(entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        return [path / name for name in sorted(names)]
+
     def extract_reference_timestamp(self, session_dir):
         # 1. Try Cam1
         ts_file = session_dir / "camera_1" / "timestamps.txt"
@@ -399,13 +564,13 @@ class Command(BaseCommand):
             if ts: return ts
         
         # 2. Try Sonar raw
-        raw_files = sorted(list((session_dir / "sonar" / "raw").glob("*.txt")))
+        raw_files = self._scan_dir(session_dir / "sonar" / "raw", suffixes=(".txt",))
         if raw_files:
             ts = self._read_first_ts(raw_files[0])
             if ts: return ts
 
         # 3. Fallback: Parse Epoch from Folder Name
-        match = re.search(r'session_(\d+)', session_dir.name)
+        match = SESSION_RE.search(session_dir.name)
         if match:
             epoch_ts = int(match.group(1))
             return datetime.fromtimestamp(epoch_ts, tz=timezone.utc)
@@ -422,7 +587,25 @@ class Command(BaseCommand):
         return None
 
     def find_mission_by_time(self, dt):
-        return Mission.objects.filter(
-            Q(start_time__lte=dt) & 
-            (Q(end_time__gte=dt) | Q(end_time__isnull=True))
-        ).first()
\ No newline at end of file
+        # Latest-starting mission that covers dt (Mission's default ordering is -start_time)
+        for i in range(bisect_right(self.mission_starts, dt) - 1, -1, -1):
+            mission = self.missions[i]
+            if mission.end_time is None or mission.end_time >= dt:
+                return mission
+        return None
+
+
+def _parse_sonar_row(raw_file):
+    """Returns (frame_number, timestamp) from a sonar raw frame file, or None if unreadable."""
+    match = SONAR_FRAME_RE.search(raw_file.name)
+    if not match:
+        return None
+    try:
+        with open(raw_file, 'r') as f:
+            parts = f.readline().split()
+        if len(parts) >= 2:
+            return int(match.group(1)), datetime.fromtimestamp(int(parts[1]) / 1000.0, UTC)
+    except Exception:
+        pass
+    return None
+
@@ -1,6 +1,7 @@
+import warnings
+import numpy as np
+import pandas as pd
 from django.core.management.base import BaseCommand, CommandError
-from datetime import datetime
-from django.utils.timezone import make_aware
 from django.db import transaction
 from missions.models import TideLevel
 from zoneinfo import ZoneInfo  # Python 3.9+
@@ -27,8 +28,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--batch-size',
             type=int,
-            default=1000,
-            help='Batch size for bulk_create to limit memory usage (default: 1000)'
+            default=10000,
+            help='Rows per INSERT statement issued by bulk_create (default: 10000)'
         )
 
     def handle(self, *args, **options):
@@ -39,42 +40,63 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Importing tide data from {filepath} for port {port_name}")
 
-        with open(filepath, 'r') as file:
-            lines = file.readlines()
-
-        datetimes = []
-        new_entries = []
-
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            parts = line.split(',')
-            if len(parts) != 3:
-                self.stdout.write(self.style.WARNING(f"Skipping malformed line: {line}"))
-                continue
-            date_str, time_str, height_str = parts
+        # Vectorised parse: one C-level CSV read and one datetime conversion for the whole file
+        columns = ['date', 'time', 'height']
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', pd.errors.ParserWarning)
             try:
-                dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-                dt_aware = make_aware(dt, AZORES_TZ)
-            except ValueError:
-                self.stdout.write(self.style.WARNING(f"Skipping line with invalid date/time: {line}"))
-                continue
-            try:
-                height = float(height_str)
-            except ValueError:
-                self.stdout.write(self.style.WARNING(f"Invalid tide height value, skipping line: {line}"))
-                continue
+                df = pd.read_csv(
+                    filepath, header=None, names=columns, dtype=str,
+                    comment='#', skip_blank_lines=True, on_bad_lines='warn'
+                )
+            except pd.errors.EmptyDataError:
+                # Empty or comment-only file
+                df = pd.DataFrame(columns=columns, dtype=str)
+        for w in caught:
+            # Rows with more than 3 fields: "Skipping line N: expected 3 fields, saw M"
+            self.stdout.write(self.style.WARNING(str(w.message).strip()))
+
+        def line_of(row):
+            return ','.join(v for v in row if isinstance(v, str))
+
+        # Rows with fewer than 3 fields (whitespace-only lines are dropped silently)
+        malformed = df[columns].isna().any(axis=1)
+        for row in df[malformed].itertuples(index=False):
+            if line_of(row).strip():
+                self.stdout.write(self.style.WARNING(f"Skipping malformed line: {line_of(row)}"))
+        df = df[~malformed]
 
-            datetimes.append(dt_aware)
-            new_entries.append(TideLevel(port_name=port_name, time=dt_aware, tide_height_m=height))
+        naive = pd.to_datetime(df['date'] + ' ' + df['time'], format='%Y-%m-%d %H:%M', errors='coerce')
+        heights = pd.to_numeric(df['height'], errors='coerce')
+        bad_time = naive.isna()
+        bad_height = heights.isna() & ~bad_time
+        for row in df[bad_time].itertuples(index=False):
+            self.stdout.write(self.style.WARNING(f"Skipping line with invalid date/time: {line_of(row)}"))
+        for row in df[bad_height].itertuples(index=False):
+            self.stdout.write(self.style.WARNING(f"Invalid tide height value, skipping line: {line_of(row)}"))
 
-        if not datetimes:
+        valid = ~(bad_time | bad_height)
+        naive = naive[valid]
+        heights = heights[valid]
+
+        if naive.empty:
             self.stdout.write(self.style.ERROR("No valid tide data found in the file"))
             return
 
-        min_datetime = min(datetimes)
-        max_datetime = max(datetimes)
+        # Same wall-clock interpretation as make_aware(): repeated times at the end of DST
+        # take the first (summer) offset, skipped times at the start of DST move forward by the 1h gap
+        times = naive.dt.tz_localize(
+            AZORES_TZ,
+            ambiguous=np.ones(len(naive), dtype=bool),
+            nonexistent=pd.Timedelta(hours=1)
+        )
+        new_entries = [
+            TideLevel(port_name=port_name, time=dt_aware, tide_height_m=height)
+            for dt_aware, height in zip(times.dt.to_pydatetime(), heights.tolist())
+        ]
+
+        min_datetime = times.min().to_pydatetime()
+        max_datetime = times.max().to_pydatetime()
 
         existing_qs = TideLevel.objects.filter(port_name=port_name, time__range=(min_datetime, max_datetime))
 
@@ -88,9 +110,7 @@ class Command(BaseCommand):
             if force:
                 existing_qs.delete()
         
-            # Insert entries in batches
-            for i in range(0, len(new_entries), batch_size):
-                batch = new_entries[i:i + batch_size]
-                TideLevel.objects.bulk_create(batch, batch_size=batch_size)
+            # bulk_create splits the rows into batch_size INSERTs itself
+            TideLevel.objects.bulk_create(new_entries, batch_size=batch_size)
 
         self.stdout.write(self.style.SUCCESS(f"Successfully imported {len(new_entries)} tide level entries."))
\ No newline at end of file
@@ -1,22 +1,64 @@
+import io
 import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice, repeat
 from pathlib import Path
+import django
 from django.conf import settings
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone as django_timezone
-from django.db import transaction
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Count
 from missions.models import (
     Mission, LogFile, SensorDeployment, 
     NavSample, ImuSample, CompassSample, PressureSample
 )
-from pymavlink import mavutil
+from missions.management.commands._frameindex import copy_value
+from pymavlink.DFReader import DFReader_binary, FORMAT_TO_STRUCT
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns read from each message type turned into samples, with the value used when
+# a log's format lacks the column. Everything else in the log is skipped by the reader.
+MESSAGE_FIELDS = {
+    'IMU': (('TimeUS', 0), ('I', None), ('GyrX', 0.0), ('GyrY', 0.0), ('GyrZ', 0.0),
+            ('AccX', 0.0), ('AccY', 0.0), ('AccZ', 0.0)),
+    'MAG': (('TimeUS', 0), ('I', None), ('MagX', 0.0), ('MagY', 0.0), ('MagZ', 0.0)),
+    'BARO': (('TimeUS', 0), ('I', None), ('Press', 0.0), ('Temp', None)),
+    'AHR2': (('TimeUS', 0), ('Roll', None), ('Pitch', None), ('Yaw', None), ('Alt', None)),
+}
+
+# numpy equivalents of the struct codes DataFlash columns are unpacked with
+# (string columns, e.g. '64s', map to fixed-size bytes)
+STRUCT_TO_NUMPY = {
+    'b': 'i1', 'B': 'u1', 'h': '<i2', 'H': '<u2', 'i': '<i4', 'I': '<u4',
+    'q': '<i8', 'Q': '<u8', 'e': '<f2', 'f': '<f4', 'd': '<f8',
+}
+
+UTC = timezone.utc
+ONE_US = timedelta(microseconds=1)
+
+# Column order of the sample tuples buffered for each model. The timestamp column
+# holds the raw TimeUS until the slab is flushed.
+SAMPLE_FIELDS = {
+    ImuSample: ('timestamp', 'log_file', 'deployment',
+                'gx_rad_s', 'gy_rad_s', 'gz_rad_s', 'ax_m_s2', 'ay_m_s2', 'az_m_s2'),
+    CompassSample: ('timestamp', 'log_file', 'deployment', 'mx_uT', 'my_uT', 'mz_uT'),
+    PressureSample: ('timestamp', 'log_file', 'deployment', 'pressure_pa', 'temperature_C'),
+    NavSample: ('timestamp', 'mission', 'roll_deg', 'pitch_deg', 'yaw_deg', 'depth_m'),
+}
+
 
 class Command(BaseCommand):
-    help = "Parse log files. Use --all to parse all unprocessed .bin files, or --logfile-id for a specific one."
+    help = (
+        "Parse log files. Use --all to parse all unprocessed .bin files, or --logfile-id for a specific one. "
+        "On PostgreSQL each file commits with synchronous_commit=off: a crash can lose the most recent "
+        "commits, and those files are simply left unparsed for the next run."
+    )
 
     def add_arguments(self, parser):
         # Create a mutually exclusive group so user must pick one method
@@ -36,7 +78,29 @@ class Command(BaseCommand):
             "--batch-size", 
             type=int, 
             default=1000, 
-            help="Batch size for bulk insert operations."
+            help="Rows per INSERT statement issued by bulk_create."
+        )
+        parser.add_argument(
+            "--slab-size",
+            type=int,
+            default=50000,
+            help="Samples buffered per model before they are written to the database."
+        )
+        parser.add_argument(
+            "--use-orm",
+            action="store_true",
+            help="Insert samples with bulk_create instead of PostgreSQL COPY."
+        )
+        parser.add_argument(
+            "--allow-conflicts",
+            action="store_true",
+            help="Pass ignore_conflicts to bulk_create (ORM inserts only; the sample tables have no unique constraints)."
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="Drop the sample tables' indexes for the duration of the run and rebuild them at the end. "
+                 "Only use this when nothing else is querying those tables."
         )
         parser.add_argument(
             "--force", 
@@ -61,10 +125,21 @@ class Command(BaseCommand):
             default="1", 
             help="BARO instances to parse (comma-separated, e.g., '1')."
         )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes used to parse log files in parallel (default: CPU count)."
+        )
 
     def handle(self, *args, **options):
         batch_size = options["batch_size"]
+        slab_size = options["slab_size"]
+        use_orm = options["use_orm"]
+        allow_conflicts = options["allow_conflicts"]
         force = options["force"]
+        jobs = max(1, options["jobs"] or 1)
+        defer_indexes = options["defer_indexes"]
         
         # Parse instance arguments
         imu_instances = [int(x.strip()) for x in options["imu_instances"].split(",")]
@@ -81,40 +156,136 @@ class Command(BaseCommand):
             if not force:
                 qs = qs.filter(already_parsed=False)
             
-            logfiles_to_process = list(qs)
+            # One grouped query gives both the file count for the progress lines and the
+            # missions whose deployments are prefetched
+            files_per_mission = dict(qs.order_by().values_list("mission_id").annotate(n=Count("id")))
+            total = sum(files_per_mission.values())
             
-            if not logfiles_to_process:
+            if not total:
                 self.stdout.write(self.style.WARNING("No unparsed .bin files found."))
                 return
                 
-            self.stdout.write(self.style.SUCCESS(f"Found {len(logfiles_to_process)} unparsed binary logs."))
+            self.stdout.write(self.style.SUCCESS(f"Found {total} unparsed binary logs."))
+
+            # Stream the files rather than loading them all up front, with only the
+            # columns the loader and the progress lines read
+            mission_ids = set(files_per_mission)
+            logfiles_to_process = qs.select_related("mission").only(
+                "id", "mission", "bin_path", "tlog_path", "created_at"
+            ).iterator(chunk_size=100)
         else:
             # Single ID mode
             try:
-                lf = LogFile.objects.get(pk=options["logfile_id"])
+                lf = LogFile.objects.select_related("mission").get(pk=options["logfile_id"])
                 if lf.already_parsed and not force:
                     raise CommandError(f"LogFile {lf.id} already parsed. Use --force to re-parse.")
                 logfiles_to_process = [lf]
+                total = 1
+                mission_ids = {lf.mission_id}
             except LogFile.DoesNotExist:
                 raise CommandError(f"LogFile with id={options['logfile_id']} does not exist.")
 
         # 2. Iterate and Process
-        total = len(logfiles_to_process)
+        # Deployments are fetched once for every mission involved, not once per file
+        deployments_by_mission = self.deployments_by_mission(mission_ids)
+        loader_args = (
+            batch_size, slab_size, use_orm, allow_conflicts, imu_instances, mag_instances, baro_instances
+        )
+        if defer_indexes:
+            self.stdout.write("Dropping sample table indexes until the run finishes...")
+            self.set_sample_indexes(False)
+        try:
+            self.process_logfiles(logfiles_to_process, total, jobs, deployments_by_mission, loader_args)
+        finally:
+            if defer_indexes:
+                self.stdout.write("Rebuilding sample table indexes...")
+                self.set_sample_indexes(True)
+
+    def set_sample_indexes(self, enabled):
+        """
+        Recreates (enabled=True) or drops the Meta.indexes of the sample tables, so a large
+        load does not maintain them row by row. Foreign key indexes are left in place.
+        """
+        with connection.schema_editor() as editor:
+            for model_class in SAMPLE_FIELDS:
+                for index in model_class._meta.indexes:
+                    if enabled:
+                        editor.add_index(model_class, index)
+                    else:
+                        editor.remove_index(model_class, index)
+
+    def deployments_by_mission(self, mission_ids):
+        """
+        Fetches the deployments of the given missions in one query, as
+        {mission_id: {sensor_type: {instance: deployment}}}.
+        """
+        by_mission = {mission_id: {} for mission_id in mission_ids}
+        deployments = SensorDeployment.objects.filter(mission_id__in=by_mission).select_related("sensor")
+        for deployment in deployments:
+            by_sensor_type = by_mission[deployment.mission_id]
+            by_sensor_type.setdefault(deployment.sensor.sensor_type, {})[deployment.instance] = deployment
+        return by_mission
+
+    def process_logfiles(self, logfiles_to_process, total, jobs, deployments_by_mission, loader_args):
+        """
+        Parses the given LogFiles (any iterable of `total` files), in a process pool when
+        there is more than one job.
+        """
+        if jobs > 1 and total > 1:
+            # pymavlink decoding is CPU bound, so files are parsed in separate processes.
+            workers = min(jobs, total)
+            # Close the connection first so forked workers open their own instead of sharing it
+            connections.close_all()
+            # Under spawn/forkserver (macOS, Windows, Linux from Python 3.14) workers start without
+            # Django set up, and unpickling parse_logfile imports missions.models
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+                # With the fork start method the first submit forks every worker; do it before
+                # the streamed queryset reopens the connection in this process
+                executor.submit(int).result()
+
+                # Files are read from the stream as workers free up, at most two per worker in flight
+                logfiles = iter(logfiles_to_process)
+                pending = {}
+                index = 0
+                while True:
+                    for logfile in islice(logfiles, 2 * workers - len(pending)):
+                        future = executor.submit(
+                            parse_logfile, logfile.id, deployments_by_mission[logfile.mission_id], *loader_args
+                        )
+                        pending[future] = logfile
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        logfile = pending.pop(future)
+                        index += 1
+                        output, error = future.result()
+                        self.stdout.write(self.style.SUCCESS(f"--- Finished {index}/{total}: {logfile} ---"))
+                        self.stdout.write(output, ending="")
+                        if error is None:
+                            self.stdout.write(self.style.SUCCESS(f"Successfully parsed LogFile {logfile.id}"))
+                        else:
+                            self.stdout.write(self.style.ERROR(f"Failed to process LogFile {logfile.id}: {error}"))
+            return
+
         for index, logfile in enumerate(logfiles_to_process, start=1):
             self.stdout.write(self.style.SUCCESS(f"--- Processing {index}/{total}: {logfile} ---"))
             
             try:
-                self.process_single_file(
-                    logfile, batch_size, imu_instances, mag_instances, baro_instances
-                )
+                self.process_single_file(logfile, deployments_by_mission[logfile.mission_id], *loader_args)
                 self.stdout.write(self.style.SUCCESS(f"Successfully parsed LogFile {logfile.id}"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Failed to process LogFile {logfile.id}: {e}"))
                 logger.exception(f"Error processing LogFile {logfile.id}")
                 # We continue to the next file instead of crashing the whole command
 
-    def process_single_file(self, logfile, batch_size, imu_instances, mag_instances, baro_instances):
-        """Helper to run the loader for a single log file."""
+    def process_single_file(self, logfile, deployments_by_sensor_type, batch_size, slab_size, use_orm,
+                            allow_conflicts, imu_instances, mag_instances, baro_instances):
+        """
+        Helper to run the loader for a single log file. deployments_by_sensor_type maps
+        sensor type -> instance -> SensorDeployment for the file's mission.
+        """
         mission = logfile.mission
         
         # Basic Validation
@@ -123,15 +294,6 @@ class Command(BaseCommand):
              # You might optionally skip this instead of raising error.
              raise CommandError(f"Mission {mission.id} has no end_time set.")
 
-        # Get deployments for linking samples
-        deployments = SensorDeployment.objects.filter(mission=mission)
-        deployments_by_sensor_type = {}
-        for deployment in deployments:
-            sensor_type = deployment.sensor.sensor_type
-            instance = getattr(deployment, "instance", None)
-            if instance is not None:
-                deployments_by_sensor_type.setdefault(sensor_type, {})[instance] = deployment
-        
         # Initialize the simplified loader
         loader = SimplifiedBinLoader(
             logfile=logfile,
@@ -141,15 +303,98 @@ class Command(BaseCommand):
             mag_instances=mag_instances,
             baro_instances=baro_instances,
             batch_size=batch_size,
+            slab_size=slab_size,
+            use_orm=use_orm,
+            allow_conflicts=allow_conflicts,
             stdout=self.stdout
         )
         
-        # Run parsing
-        loader.run()
-        
-        # Mark as parsed
-        logfile.already_parsed = True
-        logfile.save()
+        # One transaction per file: the samples and the parsed flag commit together,
+        # and a failed write leaves the file unparsed with nothing half-loaded
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # A file can always be parsed again, so don't wait for the WAL flush at commit
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL synchronous_commit = off")
+
+            # Run parsing
+            loader.run()
+            
+            # Mark as parsed (a single-column update; the row was loaded with deferred columns)
+            LogFile.objects.filter(pk=logfile.pk).update(already_parsed=True)
+
+
+# -------------------------------------------------------------------------
+# WORKER FUNCTION (module level so it can be pickled by ProcessPoolExecutor)
+# -------------------------------------------------------------------------
+def parse_logfile(logfile_id, deployments_by_sensor_type, *loader_args):
+    """
+    Parses one LogFile in a worker process.
+    Returns (output, error message or None), where output is everything the loader
+    wrote to stdout; the parent process writes it out.
+    """
+    output = io.StringIO()
+    command = Command(stdout=output)
+    try:
+        logfile = LogFile.objects.get(pk=logfile_id)
+        command.process_single_file(logfile, deployments_by_sensor_type, *loader_args)
+        return output.getvalue(), None
+    except Exception as e:
+        logger.exception(f"Error processing LogFile {logfile_id}")
+        return output.getvalue(), str(e)
+
+
+class TimeUSReader(DFReader_binary):
+    """
+    DFReader_binary without a wall clock. Samples are timed from their raw TimeUS, so the
+    clock detection pass run at open (a decode of every GPS message, or of the whole log when
+    no GPS message is present) and the per-message timestamp update are skipped.
+    """
+    def init_clock(self):
+        self.clock = None
+
+    def message_count(self, name):
+        """Number of indexed messages of type `name`."""
+        mtype = self.name_to_id.get(name)
+        return 0 if mtype is None else len(self.offsets[mtype])
+
+    def iter_columns(self, name, fields, chunk_size):
+        """
+        Decodes the messages of type `name` straight from the mapped file, chunk_size at a
+        time, instead of unpacking a DFMessage per message. Yields a list with one numpy
+        array per field ((name, default) pairs), or None for fields the log's format lacks.
+        Multipliers are applied the same way DFMessage.__getattr__ does.
+        """
+        mtype = self.name_to_id.get(name)
+        if mtype is None:
+            return
+        fmt = self.formats[mtype]
+        try:
+            record = np.dtype([
+                (f"f{i}", STRUCT_TO_NUMPY.get(code) or f"S{code[:-1]}")
+                for i, code in enumerate(FORMAT_TO_STRUCT[c][0] for c in fmt.format)
+            ])
+        except (KeyError, TypeError):
+            return
+        body_len = fmt.len - 3
+        if record.itemsize != body_len:
+            return
+
+        # Messages cut off by the end of the log can't be decoded
+        offsets = np.asarray(self.offsets[mtype], dtype=np.int64)
+        offsets = offsets[offsets + fmt.len <= self.data_len]
+
+        data = np.frombuffer(self.data_map, dtype=np.uint8)
+        body = np.arange(3, fmt.len)
+        indexes = [fmt.colhash.get(field) for field, _ in fields]
+
+        for start in range(0, len(offsets), chunk_size):
+            # One gather per chunk: rows of message bodies reinterpreted as records
+            records = data[offsets[start:start + chunk_size, None] + body].view(record).ravel()
+            yield [
+                None if index is None else _scaled(records[f"f{index}"], fmt.msg_mults[index])
+                for index in indexes
+            ]
 
 
 class SimplifiedBinLoader:
@@ -158,15 +403,30 @@ class SimplifiedBinLoader:
     """
     
     def __init__(self, logfile, mission, deployments_by_sensor_type, 
-                 imu_instances, mag_instances, baro_instances, batch_size=1000, stdout=None):
+                 imu_instances, mag_instances, baro_instances, batch_size=1000, slab_size=50000,
+                 use_orm=False, allow_conflicts=False, stdout=None):
         self.logfile = logfile
         self.mission = mission
         self.deployments_by_sensor_type = deployments_by_sensor_type
         self.imu_instances = imu_instances
         self.mag_instances = mag_instances
         self.baro_instances = baro_instances
+        # Deployment id per parsed instance, resolved once instead of per message
+        self._imu_deployments = self._deployment_ids('imu', imu_instances)
+        self._mag_deployments = self._deployment_ids('compass', mag_instances)
+        self._baro_deployments = self._deployment_ids('pressure', baro_instances)
         self.batch_size = batch_size
+        self.slab_size = slab_size
+        # COPY is PostgreSQL only; other backends always go through bulk_create
+        self.use_orm = use_orm or connection.vendor != 'postgresql'
+        self.allow_conflicts = allow_conflicts
         self.stdout = stdout
+
+        # Mission window as TimeUS bounds (microseconds since boot, relative to the
+        # log creation time) so out-of-window messages are dropped with an int compare
+        self._t0 = logfile.created_at
+        self._win_lo_us = (mission.start_time - self._t0) // ONE_US
+        self._win_hi_us = (mission.end_time - self._t0) // ONE_US
         
         self.stats = {
             "total_messages": 0,
@@ -184,12 +444,10 @@ class SimplifiedBinLoader:
         if not bin_path.exists():
             raise CommandError(f"Binary log file not found: {bin_path}")
         
-        # Initialize pymavlink connection
+        # Open the dataflash log directly; DFReader_binary mmaps the file and indexes
+        # message offsets by type, so the wanted messages can be decoded without walking the rest
         try:
-            self.log_connection = mavutil.mavlink_connection(
-                str(bin_path), 
-                dialect="ardupilotmega"
-            )
+            self.log_connection = TimeUSReader(str(bin_path), zero_time_base=True)
         except Exception as e:
             raise CommandError(f"Failed to open log file: {str(e)}")
     
@@ -201,201 +459,197 @@ class SimplifiedBinLoader:
     def run(self):
         """Main parsing loop with simplified logic."""
         self.log_message(f"Starting parsing for {self.logfile.bin_path}...")
-        
-        # Initialize batch containers
-        batches = {
-            ImuSample: [],
-            CompassSample: [],
-            PressureSample: [],
-            NavSample: [],
-        }
-        
-        # Get the log file creation time as baseline for timestamp conversion
-        log_file_created = self.logfile.created_at
-        
-        # Process messages
-        for msg in iter(self.log_connection.recv_match, None):
-            if msg is None:
-                break
-                
-            self.stats["total_messages"] += 1
-            
-            try:
-                # Convert timestamp to timezone-aware datetime
-                timestamp = self._resolve_timestamp(msg, log_file_created)
-                
-                # Check if timestamp is within mission bounds
-                if not (self.mission.start_time <= timestamp <= self.mission.end_time):
-                    self.stats["filtered_messages"] += 1
-                    continue
-                
-                # Process message based on type
-                msg_type = msg.get_type()
-                
-                if msg_type == "IMU":
-                    self._process_imu_message(msg, timestamp, batches)
-                elif msg_type == "MAG":
-                    self._process_mag_message(msg, timestamp, batches)
-                elif msg_type == "BARO":
-                    self._process_baro_message(msg, timestamp, batches)
-                elif msg_type == "AHR2":
-                    self._process_ahr2_message(msg, timestamp, batches)
-                
-                # Check if we need to flush batches
-                for model_class, batch in batches.items():
-                    if len(batch) >= self.batch_size:
-                        self._flush_batch(model_class, batch)
-                        batches[model_class] = []
-                            
-            except Exception as e:
-                self.stats["errors"] += 1
-                # logger.error(f"Error processing message {msg.get_type()}: {str(e)}")
-                continue
-        
-        # Flush any remaining batches
-        for model_class, batch in batches.items():
-            if batch:
-                self._flush_batch(model_class, batch)
+
+        n_total = n_filtered = n_errors = 0
+        saved_by_type = {}
+
+        win_lo_us = self._win_lo_us
+        win_hi_us = self._win_hi_us
+        logfile_id = self.logfile.id
+        mission_id = self.mission.id
+        reader = self.log_connection
+
+        # Full slabs are written by a background thread, so the database round trips
+        # overlap with decoding the rest of the log
+        writer = self._start_writer()
+
+        try:
+            # Each message type is decoded a slab at a time as numpy columns (values follow
+            # MESSAGE_FIELDS), filtered and turned into sample rows without a Python-level
+            # step per message. IMU/MAG/BARO rows are only kept for requested instances that
+            # have a deployment; logs without an instance column never match.
+            for msg_type, model_class, deployments in (
+                ("IMU", ImuSample, self._imu_deployments),
+                ("MAG", CompassSample, self._mag_deployments),
+                ("BARO", PressureSample, self._baro_deployments),
+                ("AHR2", NavSample, None),
+            ):
+                fields = MESSAGE_FIELDS[msg_type]
+                n_messages = reader.message_count(msg_type)
+                n_decoded = n_saved = 0
+
+                for columns in reader.iter_columns(msg_type, fields, self.slab_size):
+                    if columns[0] is None:
+                        # No TimeUS column, nothing can be placed in the mission window
+                        break
+                    time_us = columns[0].astype(np.int64)
+                    n_decoded += len(time_us)
+
+                    # Check which messages are within mission bounds (TimeUS is converted at flush time)
+                    keep = (time_us >= win_lo_us) & (time_us <= win_hi_us)
+                    n_filtered += len(keep) - np.count_nonzero(keep)
+
+                    if deployments is None:
+                        # AHR2 navigation attitude and altitude; depth is negative of altitude
+                        _, roll, pitch, yaw, alt = columns
+                        depth_m = None if alt is None else -alt
+                        rows = list(zip(
+                            time_us[keep].tolist(), repeat(mission_id),
+                            *(_column_values(column, keep, default) for column, (_, default)
+                              in zip((roll, pitch, yaw, depth_m), fields[1:]))
+                        ))
+                    else:
+                        deployment_ids = _deployment_column(columns[1], deployments, len(time_us))
+                        keep &= deployment_ids != 0
+                        rows = list(zip(
+                            time_us[keep].tolist(), repeat(logfile_id), deployment_ids[keep].tolist(),
+                            *(_column_values(column, keep, default) for column, (_, default)
+                              in zip(columns[2:], fields[2:]))
+                        ))
+
+                    if rows:
+                        n_saved += len(rows)
+                        self._queue_slab(model_class, rows)
+
+                # Messages cut off by the end of the log (or in a layout that can't be
+                # decoded) are counted as errors
+                n_total += n_messages
+                n_errors += n_messages - n_decoded
+                saved_by_type[msg_type] = n_saved
+        finally:
+            # Wait for the writer to drain, also when parsing was interrupted
+            self._stop_writer(writer)
+
+        # Counters were kept in locals; write them back once
+        self.stats["total_messages"] += n_total
+        self.stats["filtered_messages"] += n_filtered
+        self.stats["errors"] += n_errors
+        self.stats["saved_samples"] += sum(saved_by_type.values())
+        by_type = self.stats["by_type"]
+        for msg_type, count in saved_by_type.items():
+            if count:
+                by_type[msg_type] = by_type.get(msg_type, 0) + count
         
         # Print statistics
         self._print_statistics()
     
-    def _process_imu_message(self, msg, timestamp, batches):
-        """Process IMU messages for specified instances."""
-        if not hasattr(msg, 'I'):
-            return
-        
-        instance = msg.I
-        if instance not in self.imu_instances:
-            return
-        
-        # Get appropriate deployment
-        deployment = self._get_deployment_for_sensor_type('imu', instance)
-        if not deployment:
-            return
-        
-        # Create IMU sample
-        sample = ImuSample(
-            log_file=self.logfile,
-            deployment=deployment,
-            timestamp=timestamp,
-            gx_rad_s=getattr(msg, 'GyrX', 0.0),
-            gy_rad_s=getattr(msg, 'GyrY', 0.0),
-            gz_rad_s=getattr(msg, 'GyrZ', 0.0),
-            ax_m_s2=getattr(msg, 'AccX', 0.0),
-            ay_m_s2=getattr(msg, 'AccY', 0.0),
-            az_m_s2=getattr(msg, 'AccZ', 0.0),
-        )
-        
-        batches[ImuSample].append(sample)
-        self.stats["saved_samples"] += 1
-        self.stats["by_type"]["IMU"] = self.stats["by_type"].get("IMU", 0) + 1
-    
-    def _process_mag_message(self, msg, timestamp, batches):
-        """Process MAG messages for specified instances."""
-        if not hasattr(msg, 'I'):
-            return
-        
-        instance = msg.I
-        if instance not in self.mag_instances:
-            return
-        
-        # Get appropriate deployment
-        deployment = self._get_deployment_for_sensor_type('compass', instance)
-        if not deployment:
-            return
-        
-        # Create compass sample
-        sample = CompassSample(
-            log_file=self.logfile,
-            deployment=deployment,
-            timestamp=timestamp,
-            mx_uT=getattr(msg, 'MagX', 0.0),
-            my_uT=getattr(msg, 'MagY', 0.0),
-            mz_uT=getattr(msg, 'MagZ', 0.0),
-        )
-        
-        batches[CompassSample].append(sample)
-        self.stats["saved_samples"] += 1
-        self.stats["by_type"]["MAG"] = self.stats["by_type"].get("MAG", 0) + 1
-    
-    def _process_baro_message(self, msg, timestamp, batches):
-        """Process BARO messages for specified instances."""
-        if not hasattr(msg, 'I'):
-            return
-        
-        instance = msg.I
-        if instance not in self.baro_instances:
-            return
-        
-        # Get appropriate deployment
-        deployment = self._get_deployment_for_sensor_type('pressure', instance)
-        if not deployment:
-            return
-        
-        # Create pressure sample
-        sample = PressureSample(
-            log_file=self.logfile,
-            deployment=deployment,
-            timestamp=timestamp,
-            pressure_pa=getattr(msg, 'Press', 0.0),
-            temperature_C=getattr(msg, 'Temp', None),
-        )
-        
-        batches[PressureSample].append(sample)
-        self.stats["saved_samples"] += 1
-        self.stats["by_type"]["BARO"] = self.stats["by_type"].get("BARO", 0) + 1
-    
-    def _process_ahr2_message(self, msg, timestamp, batches):
-        """Process AHR2 messages for navigation altitude data."""
-        # Create navigation sample with altitude data
-        alt = getattr(msg, 'Alt', None)
-        # depth is negative of altitude
-        depth_m = -alt if alt is not None else None
-        sample = NavSample(
-            mission=self.mission,
-            timestamp=timestamp,
-            roll_deg=getattr(msg, 'Roll', None),
-            pitch_deg=getattr(msg, 'Pitch', None),
-            yaw_deg=getattr(msg, 'Yaw', None),
-            depth_m=depth_m,  # Depth in meters
-        )
-        
-        batches[NavSample].append(sample)
-        self.stats["saved_samples"] += 1
-        self.stats["by_type"]["AHR2"] = self.stats["by_type"].get("AHR2", 0) + 1
-    
-    def _get_deployment_for_sensor_type(self, sensor_type, instance):
-        """Get deployment for a specific sensor type and instance."""
-        instances = self.deployments_by_sensor_type.get(sensor_type, {})
-        deployment = instances.get(instance)
-        if deployment:
-            return deployment
-        # Only log warning once per missing deployment to reduce noise
-        return None
+    def _deployment_ids(self, sensor_type, instances):
+        """Maps each requested instance that has a deployment of this sensor type to its id."""
+        deployments = self.deployments_by_sensor_type.get(sensor_type, {})
+        return {
+            instance: deployments[instance].id
+            for instance in instances
+            if instance in deployments
+        }
     
-    def _resolve_timestamp(self, msg, log_file_created):
-        """Convert message timestamp to timezone-aware datetime."""
-        if hasattr(msg, 'TimeUS') and msg.TimeUS:
-            # TimeUS is microseconds since boot
-            time_offset_seconds = msg.TimeUS / 1_000_000
-            return log_file_created + django_timezone.timedelta(seconds=time_offset_seconds)
-        
-        # Last resort: use log file creation time
-        return log_file_created
+    def _materialize_timestamps(self, rows):
+        """
+        Converts the TimeUS column (microseconds since boot) of a slab to UTC datetime64[us]
+        values in one numpy pass. A missing TimeUS (0) resolves to the log file creation time.
+        """
+        time_us = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        t0 = np.datetime64(self._t0.astimezone(UTC).replace(tzinfo=None), 'us')
+        return t0 + time_us.astype('timedelta64[us]')
     
+    def _start_writer(self):
+        """Starts the thread that writes queued (model_class, rows) slabs to the database."""
+        # At most two slabs wait in the queue, so parsing blocks rather than buffering the whole log
+        self._slabs = queue.Queue(maxsize=2)
+        self._write_error = None
+
+        # The writer reuses this thread's connection (and any transaction open on it);
+        # nothing else touches the database until the writer is stopped.
+        db_connection = connections[DEFAULT_DB_ALIAS]
+        db_connection.inc_thread_sharing()
+        writer = threading.Thread(target=self._write_slabs, args=(db_connection,), daemon=True)
+        writer.start()
+        return writer
+
+    def _write_slabs(self, db_connection):
+        """
+        Writer thread: flushes slabs from the queue until it receives None.
+        After a failed write the transaction is unusable, so the remaining slabs are
+        only drained and the error is re-raised by _stop_writer.
+        """
+        connections[db_connection.alias] = db_connection
+        while True:
+            item = self._slabs.get()
+            if item is None:
+                break
+            if self._write_error is not None:
+                continue
+            try:
+                self._flush_batch(*item)
+            except Exception as e:
+                logger.error(f"Error saving batch of {item[0].__name__}: {str(e)}")
+                self._write_error = e
+
+    def _queue_slab(self, model_class, rows):
+        """Hands a slab of rows to the writer thread and returns an empty list for the next one."""
+        self._slabs.put((model_class, rows))
+        return []
+
+    def _stop_writer(self, writer):
+        """Waits for the queued slabs to be written and re-raises a failed write."""
+        self._slabs.put(None)
+        writer.join()
+        connections[DEFAULT_DB_ALIAS].dec_thread_sharing()
+        if self._write_error is not None:
+            raise self._write_error
+
     def _flush_batch(self, model_class, batch):
-        """Flush a batch of samples to the database."""
+        """
+        Flush a slab of sample tuples to the database with COPY, or batch_size rows per INSERT.
+        Runs inside the per-file transaction opened by process_single_file.
+        """
         if not batch:
             return
         
-        try:
-            with transaction.atomic():
-                model_class.objects.bulk_create(batch, ignore_conflicts=True)
-        except Exception as e:
-            logger.error(f"Error saving batch of {model_class.__name__}: {str(e)}")
-            self.stats["errors"] += len(batch)
+        timestamps = self._materialize_timestamps(batch)
+        if self.use_orm:
+            # Instances are built lazily and handed over one INSERT's worth at a time, so only
+            # batch_size of them are alive instead of the whole slab
+            fields = [model_class._meta.get_field(name).attname for name in SAMPLE_FIELDS[model_class]]
+            instances = (
+                model_class(**dict(zip(fields, (timestamp.replace(tzinfo=UTC),) + row[1:])))
+                for timestamp, row in zip(timestamps.tolist(), batch)
+            )
+            while True:
+                chunk = list(islice(instances, self.batch_size))
+                if not chunk:
+                    break
+                model_class.objects.bulk_create(chunk, ignore_conflicts=self.allow_conflicts)
+        else:
+            self._copy_samples(model_class, batch, np.datetime_as_string(timestamps, timezone='UTC'))
     
+    def _copy_samples(self, model_class, rows, timestamps):
+        """
+        Streams sample tuples into the model's table with COPY FROM STDIN.
+        `timestamps` holds the ISO strings that replace the rows' TimeUS column.
+        """
+        table = connection.ops.quote_name(model_class._meta.db_table)
+        columns = ", ".join(
+            connection.ops.quote_name(model_class._meta.get_field(name).column)
+            for name in SAMPLE_FIELDS[model_class]
+        )
+        buf = io.StringIO()
+        for timestamp, row in zip(timestamps, rows):
+            buf.write("\t".join([timestamp] + [copy_value(value) for value in row[1:]]))
+            buf.write("\n")
+        buf.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buf)
+
     def _print_statistics(self):
         """Print parsing statistics."""
         self.log_message(f"Statistics for current file:")
@@ -405,4 +659,31 @@ class SimplifiedBinLoader:
         self.log_message(f"  Errors: {self.stats['errors']}")
         self.log_message(f"  By message type:")
         for msg_type, count in self.stats['by_type'].items():
-            self.log_message(f"    {msg_type}: {count}")
\ No newline at end of file
+            self.log_message(f"    {msg_type}: {count}")
+
+
+def _scaled(column, mult):
+    """Applies a DataFlash column multiplier to a decoded column."""
+    if mult is None:
+        return column
+    if 0.0 < mult < 1.0:
+        # Dividing by 1e2/1e7 is more accurate than multiplying by 1e-2/1e-7
+        return column.astype(np.float64) / (1 / mult)
+    return column.astype(np.float64) * mult
+
+
+def _deployment_column(instances, deployments, size):
+    """Deployment id for each message from its instance column (0 where none is mapped)."""
+    deployment_ids = np.zeros(size, dtype=np.int64)
+    if instances is not None:
+        for instance, deployment_id in deployments.items():
+            deployment_ids[instances == instance] = deployment_id
+    return deployment_ids
+
+
+def _column_values(column, keep, default):
+    """Python values of a decoded column for the kept messages, or its default repeated."""
+    if column is None:
+        return repeat(default)
+    return column[keep].tolist()
+
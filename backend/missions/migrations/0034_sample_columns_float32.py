@@ -0,0 +1,94 @@
+# Generated by Django 5.2.4 on 2026-10-15 21:30
+
+import missions.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0033_mediaasset_max_depth_m_mediaasset_min_depth_m'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compasssample',
+            name='mx_uT',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='compasssample',
+            name='my_uT',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='compasssample',
+            name='mz_uT',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='ax_m_s2',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='ay_m_s2',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='az_m_s2',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='gx_rad_s',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='gy_rad_s',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='imusample',
+            name='gz_rad_s',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='navsample',
+            name='corrected_depth_m',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='navsample',
+            name='depth_m',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='navsample',
+            name='pitch_deg',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='navsample',
+            name='roll_deg',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='navsample',
+            name='yaw_deg',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pressuresample',
+            name='pressure_pa',
+            field=missions.models.Float32Field(),
+        ),
+        migrations.AlterField(
+            model_name='pressuresample',
+            name='temperature_C',
+            field=missions.models.Float32Field(blank=True, null=True),
+        ),
+    ]
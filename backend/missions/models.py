@@ -8,6 +8,18 @@ import logging
 # Get a logger instance
 logger = logging.getLogger(__name__)
 
+
+class Float32Field(models.FloatField):
+    """
+    FloatField stored in single precision (REAL) on PostgreSQL instead of double precision.
+    Used for the high-rate sample columns: ArduPilot logs these as float32 or scaled int16,
+    so the extra four bytes per column only grow the tables.
+    """
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'real'
+        return super().db_type(connection)
+
 #  ------------------------------------------------------------------
 #  1. Hardware options
 #  ------------------------------------------------------------------
@@ -325,15 +337,15 @@ class NavSample(models.Model):
     timestamp = models.DateTimeField()
 
     # depth from pressure sensor
-    depth_m = models.FloatField(null=True, blank=True)
+    depth_m = Float32Field(null=True, blank=True)
 
     # depth after hydrographic correction. So represented from hydrographic zero.
     # positive downwards from hydrographic zero level.
-    corrected_depth_m = models.FloatField(null=True, blank=True)
+    corrected_depth_m = Float32Field(null=True, blank=True)
 
-    roll_deg    = models.FloatField(null=True, blank=True)
-    pitch_deg   = models.FloatField(null=True, blank=True)
-    yaw_deg     = models.FloatField(null=True, blank=True)
+    roll_deg    = Float32Field(null=True, blank=True)
+    pitch_deg   = Float32Field(null=True, blank=True)
+    yaw_deg     = Float32Field(null=True, blank=True)
 
     class Meta:
         indexes = [
@@ -510,29 +522,29 @@ class SensorSampleBase(models.Model):
     
 class ImuSample(SensorSampleBase):
     """6-DOF IMU: angular rate (rad s⁻¹) + specific force (m s⁻²)."""
-    gx_rad_s = models.FloatField()
-    gy_rad_s = models.FloatField()
-    gz_rad_s = models.FloatField()
-    ax_m_s2  = models.FloatField()
-    ay_m_s2  = models.FloatField()
-    az_m_s2  = models.FloatField()
+    gx_rad_s = Float32Field()
+    gy_rad_s = Float32Field()
+    gz_rad_s = Float32Field()
+    ax_m_s2  = Float32Field()
+    ay_m_s2  = Float32Field()
+    az_m_s2  = Float32Field()
 
     EXPECTED_SENSOR_TYPE = Sensor.SensorType.IMU
 
 
 class CompassSample(SensorSampleBase):
     """3-axis magnetic field in µT."""
-    mx_uT = models.FloatField()
-    my_uT = models.FloatField()
-    mz_uT = models.FloatField()
+    mx_uT = Float32Field()
+    my_uT = Float32Field()
+    mz_uT = Float32Field()
 
     EXPECTED_SENSOR_TYPE = Sensor.SensorType.COMPASS
 
 
 class PressureSample(SensorSampleBase):
     """Absolute pressure plus optional temperature."""
-    pressure_pa   = models.FloatField()
-    temperature_C = models.FloatField(null=True, blank=True)
+    pressure_pa   = Float32Field()
+    temperature_C = Float32Field(null=True, blank=True)
 
     EXPECTED_SENSOR_TYPE = Sensor.SensorType.PRESSURE
 
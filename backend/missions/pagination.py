@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SampleCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the high-volume sample endpoints. Each page is a range scan on
+    the (mission|deployment, timestamp) indexes instead of an OFFSET that reads and
+    discards every earlier row; `limit` is kept as the page size parameter.
+    """
+    ordering = ("timestamp", "id")
+    page_size_query_param = "limit"
+    max_page_size = 5000
@@ -3,6 +3,8 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import MyTokenObtainPairSerializer
 from rest_framework.decorators import api_view, permission_classes
@@ -10,6 +12,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from . import models, serializers, filters
+from .pagination import SampleCursorPagination
 
 # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 # DJANGO REST FRAMEWORK DEFAULT SETTINGS ARE SET IN core/settings.py
@@ -103,20 +106,26 @@ class LogFileViewSet(viewsets.ModelViewSet):
 # ------------------------------------------------------------------
 # Navigation Sample
 # ------------------------------------------------------------------
+# The sample endpoints serve millions of rows: they page by cursor and only load the
+# serialized columns (related objects are written out as plain ids, so no joins).
+# Cursor paging needs a non-nullable ordering, so only timestamp is orderable.
+@method_decorator(cache_page(30), name="list")
 class NavSampleViewSet(viewsets.ModelViewSet):
-    queryset = models.NavSample.objects.select_related("mission").all()
+    queryset = models.NavSample.objects.only(*serializers.NavSampleSerializer.Meta.fields)
     serializer_class = serializers.NavSampleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SampleCursorPagination
     filterset_fields = ["mission", "depth_m", "timestamp"]
-    ordering_fields = ["timestamp", "depth_m"]
+    ordering_fields = ["timestamp"]
 
 # ------------------------------------------------------------------
 # IMU Sample
 # ------------------------------------------------------------------
 class ImuSampleViewSet(viewsets.ModelViewSet):
-    queryset = models.ImuSample.objects.select_related("deployment").all()
+    queryset = models.ImuSample.objects.only(*serializers.ImuSampleSerializer.Meta.fields)
     serializer_class = serializers.ImuSampleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SampleCursorPagination
     filterset_fields = ["deployment"]
     ordering_fields = ["timestamp"]
 
@@ -124,9 +133,10 @@ class ImuSampleViewSet(viewsets.ModelViewSet):
 # Compass Sample
 # ------------------------------------------------------------------
 class CompassSampleViewSet(viewsets.ModelViewSet):
-    queryset = models.CompassSample.objects.select_related("deployment").all()
+    queryset = models.CompassSample.objects.only(*serializers.CompassSampleSerializer.Meta.fields)
     serializer_class = serializers.CompassSampleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SampleCursorPagination
     filterset_fields = ["deployment"]
     ordering_fields = ["timestamp"]
 
@@ -134,9 +144,10 @@ class CompassSampleViewSet(viewsets.ModelViewSet):
 # Pressure Sample
 # ------------------------------------------------------------------
 class PressureSampleViewSet(viewsets.ModelViewSet):
-    queryset = models.PressureSample.objects.select_related("deployment").all()
+    queryset = models.PressureSample.objects.only(*serializers.PressureSampleSerializer.Meta.fields)
     serializer_class = serializers.PressureSampleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SampleCursorPagination
     filterset_fields = ["deployment"]
     ordering_fields = ["timestamp"]
 
@@ -1,16 +1,14 @@
 import sys
 import os
 import signal
-import subprocess
-import threading
 from datetime import datetime
 import math
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QFrame, QStatusBar,
                              QTextEdit, QLineEdit, QMessageBox, QGroupBox, QSizePolicy, QSlider)
-from PyQt6.QtCore import Qt, QProcess, QTimer, pyqtSignal, QPoint, QPointF, QRect
-from PyQt6.QtGui import QPixmap, QPainter, QColor, QFont, QPen, QPolygonF, QBrush
+from PyQt6.QtCore import Qt, QEvent, QProcess, QTimer, pyqtSignal, QPoint, QPointF, QRect
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QFont, QPen, QPolygonF, QBrush
 
 # --- LOCAL IMPORTS ---
 from src.video_thread_udp import VideoThreadUDP
@@ -51,11 +49,30 @@ class ROVConsole(QMainWindow):
 
         # --- SONAR CONFIG ---
         self.sonar_range_values = [3, 6, 9, 12, 15, 20, 25, 30]
+        self.sonar_range_labels = [f"Sonar Range: {v}m" for v in self.sonar_range_values]
+        self.last_sonar_idx = -1
         self.sonar_debounce_timer = QTimer()
         self.sonar_debounce_timer.setSingleShot(True)
         self.sonar_debounce_timer.setInterval(800)
         self.sonar_debounce_timer.timeout.connect(self.send_sonar_command_delayed)
 
+        # --- FRAME COALESCING ---
+        # Video threads can deliver frames faster than the UI paints them. Only the
+        # newest frame per label is kept and painted on a fixed ~30 FPS tick.
+        self.pending_frames = {}
+        self.frame_timer = QTimer()
+        self.frame_timer.setInterval(33)
+        self.frame_timer.timeout.connect(self.paint_pending_frames)
+        self.frame_timer.start()
+
+        # --- LOG BATCHING ---
+        # Lines are buffered and written to the log widget at most every 100 ms
+        self.log_buffer = []
+        self.log_timer = QTimer()
+        self.log_timer.setInterval(100)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+
         self.init_ui()
         self.start_background_threads()
 
@@ -134,6 +151,10 @@ class ROVConsole(QMainWindow):
         self.lbl_proc = self.create_video_label("Processed Contour")
         self.lbl_proc.setVisible(False)
 
+        # Stream labels forward their size to the video threads, which pre-scale frames
+        for lbl in (self.lbl_main, self.lbl_pana, self.lbl_sonar):
+            lbl.installEventFilter(self)
+
         # Left Column: Main Camera (60%)
         video_layout.addWidget(self.lbl_main, stretch=3)
 
@@ -219,6 +240,8 @@ class ROVConsole(QMainWindow):
         self.log_output.setReadOnly(True)
         self.log_output.setStyleSheet(styles.LOG_OUTPUT)
         self.log_output.setVisible(False)
+        # Keep the log bounded, drivers can print for hours
+        self.log_output.document().setMaximumBlockCount(500)
         main_layout.addWidget(self.log_output, 0)
 
         self.status_bar = QStatusBar()
@@ -243,20 +266,37 @@ class ROVConsole(QMainWindow):
 
         # 2. Start UDP Listeners
         self.thread_pana = VideoThreadUDP(5001, "Panasonic")
-        self.thread_pana.change_pixmap_signal.connect(lambda x: self.set_pixmap_scaled(self.lbl_pana, x))
+        self.thread_pana.change_pixmap_signal.connect(lambda x: self.enqueue_frame(self.lbl_pana, x))
+        self.update_stream_target_size(self.lbl_pana)
         self.thread_pana.start()
 
         self.thread_sonar = VideoThreadUDP(5002, "Sonar")
-        self.thread_sonar.change_pixmap_signal.connect(lambda x: self.set_pixmap_scaled(self.lbl_sonar, x))
+        self.thread_sonar.change_pixmap_signal.connect(lambda x: self.enqueue_frame(self.lbl_sonar, x))
+        self.update_stream_target_size(self.lbl_sonar)
         self.thread_sonar.start()
 
+    def append_log(self, text):
+        self.log_buffer.append(text)
+
+    def flush_log(self):
+        if not self.log_buffer:
+            return
+        lines = self.log_buffer
+        self.log_buffer = []
+        # Lines are appended one by one so each keeps its own plain/rich text detection,
+        # but the widget is only repainted once per batch
+        self.log_output.setUpdatesEnabled(False)
+        for line in lines:
+            self.log_output.append(line)
+        self.log_output.setUpdatesEnabled(True)
+
     def update_telemetry(self, heading, depth):
         self.current_heading = heading
         self.current_depth = depth
 
     def on_mavlink_connection(self, connected, msg, boot_time):
         status_color = "#4CAF50" if connected else "#F44336"
-        self.log_output.append(f"<span style='color:{status_color}'>[MAV] {msg}</span>")
+        self.append_log(f"<span style='color:{status_color}'>[MAV] {msg}</span>")
         if connected and self.current_mission_folder:
             info_file = os.path.join(self.current_mission_folder, "mission_info.txt")
             try:
@@ -266,13 +306,45 @@ class ROVConsole(QMainWindow):
                 pass
 
     # --- VIDEO & OVERLAY ---
+    def eventFilter(self, obj, event):
+        # Catches every resize of a stream label, not only those caused by the window
+        if event.type() == QEvent.Type.Resize:
+            self.update_stream_target_size(obj)
+        return super().eventFilter(obj, event)
+
+    def update_stream_target_size(self, label):
+        thread = {
+            self.lbl_main: self.thread_main,
+            self.lbl_pana: self.thread_pana,
+            self.lbl_sonar: self.thread_sonar,
+        }.get(label)
+        if thread:
+            thread.set_target_size(label.width(), label.height())
+
+    def enqueue_frame(self, label, image):
+        # A newer frame replaces one that hasn't been painted yet
+        self.pending_frames[label] = image
+
+    def paint_pending_frames(self):
+        if not self.pending_frames:
+            return
+        frames = self.pending_frames
+        self.pending_frames = {}
+        for label, image in frames.items():
+            self.set_pixmap_scaled(label, image)
+
     def set_pixmap_scaled(self, label, image):
         if image.isNull() or label.width() < 1 or label.height() < 1:
             return
 
-        pix = QPixmap.fromImage(image)
-        scaled = pix.scaled(label.size(), Qt.AspectRatioMode.KeepAspectRatio,
-                            Qt.TransformationMode.SmoothTransformation)
+        # Scaling is done on the QImage so only the final, label-sized frame is
+        # converted to a QPixmap
+        if image.size() == image.size().scaled(label.size(), Qt.AspectRatioMode.KeepAspectRatio):
+            # Frame was already fitted to the label by its video thread, no scaling needed
+            scaled = QPixmap.fromImage(image)
+        else:
+            scaled = QPixmap.fromImage(image.scaled(label.size(), Qt.AspectRatioMode.KeepAspectRatio,
+                                                    Qt.TransformationMode.SmoothTransformation))
 
         if label == self.lbl_main:
             painter = QPainter(scaled)
@@ -359,21 +431,24 @@ class ROVConsole(QMainWindow):
     # --- SLIDER LOGIC ---
     def on_sonar_slider_change(self):
         idx = self.slider_sonar_range.value()
-        val = self.sonar_range_values[idx]
-        self.lbl_sonar_range.setText(f"Sonar Range: {val}m")
+        # Dragging emits repeatedly; only relabel/restart the debounce when the range step changes
+        if idx == self.last_sonar_idx:
+            return
+        self.last_sonar_idx = idx
+        self.lbl_sonar_range.setText(self.sonar_range_labels[idx])
         self.sonar_debounce_timer.start()
 
     def send_sonar_command_delayed(self):
         idx = self.slider_sonar_range.value()
         val = float(self.sonar_range_values[idx])
-        if self.proc_sonar and self.proc_sonar.poll() is None:
+        if self.proc_sonar and self.proc_sonar.state() != QProcess.ProcessState.NotRunning:
             try:
                 cmd = f"RANGE {val:.1f}\n"
-                self.proc_sonar.stdin.write(cmd.encode('utf-8'))
-                self.proc_sonar.stdin.flush()
-                self.log_output.append(f"[CMD] Sent Sonar Range: {val:.1f}m")
+                self.proc_sonar.write(cmd.encode('utf-8'))
+                self.proc_sonar.waitForBytesWritten(10)
+                self.append_log(f"[CMD] Sent Sonar Range: {val:.1f}m")
             except Exception as e:
-                self.log_output.append(f"[ERR] Failed to send range: {e}")
+                self.append_log(f"[ERR] Failed to send range: {e}")
 
     # --- MISSION & SESSION LOGIC ---
     def create_mission(self):
@@ -425,7 +500,7 @@ class ROVConsole(QMainWindow):
 
         self.current_mission_name = name
         self.is_mission_active = True
-        self.log_output.append(f">>> MISSION CREATED: {name}")
+        self.append_log(f">>> MISSION CREATED: {name}")
         self.status_bar.showMessage(f"Mission Active: {name}")
 
         self.widget_create_mission.setVisible(False)
@@ -438,8 +513,9 @@ class ROVConsole(QMainWindow):
 
         if not self.thread_main:
             self.thread_main = SmartVideoThread(debug_mode=self.debug_mode)
-            self.thread_main.change_pixmap_signal.connect(lambda x: self.set_pixmap_scaled(self.lbl_main, x))
-            self.thread_main.log_signal.connect(self.log_output.append)
+            self.thread_main.change_pixmap_signal.connect(lambda x: self.enqueue_frame(self.lbl_main, x))
+            self.thread_main.log_signal.connect(self.append_log)
+            self.update_stream_target_size(self.lbl_main)
             self.thread_main.start()
 
         self.btn_start_session.setEnabled(True)
@@ -447,7 +523,7 @@ class ROVConsole(QMainWindow):
 
     def finish_mission(self):
         self.is_mission_active = False
-        self.log_output.append(f">>> MISSION FINISHED: {self.current_mission_name}")
+        self.append_log(f">>> MISSION FINISHED: {self.current_mission_name}")
         self.widget_active_mission.setVisible(False)
         self.widget_session_ui.setVisible(False)
         self.sonar_control_widget.setVisible(False)
@@ -469,7 +545,7 @@ class ROVConsole(QMainWindow):
         if not self.is_mission_active:
             return
 
-        self.log_output.append(">>> SESSION STARTING...")
+        self.append_log(">>> SESSION STARTING...")
         session_id = f"session_{int(datetime.now().timestamp())}"
         session_full_path = os.path.join(self.current_mission_folder, session_id)
         self.current_session_path = os.path.abspath(session_full_path)
@@ -481,7 +557,7 @@ class ROVConsole(QMainWindow):
         if not os.path.exists(camera0_path):
             os.makedirs(camera0_path)
 
-        self.log_output.append(f"[INFO] Saving session to: {self.current_session_path}")
+        self.append_log(f"[INFO] Saving session to: {self.current_session_path}")
         unix_ts_video = int(datetime.now().timestamp())
         main_cam_file = os.path.join(camera0_path, f"main_rec_{unix_ts_video}.mkv")
 
@@ -493,13 +569,9 @@ class ROVConsole(QMainWindow):
         if self.debug_mode:
             drv_args.append("--debug")
 
-        self.proc_panasonic = self.create_process(f"./bin/panasonic_driver{ext}", drv_args)
-        if not self.proc_panasonic:
-            self.log_output.append("[WARN] Panasonic Driver failed to start.")
-
-        self.proc_sonar = self.create_process(f"./bin/sonoptix_driver{ext}", drv_args)
-        if not self.proc_sonar:
-            self.log_output.append("[WARN] Sonar Driver failed to start.")
+        # Start-up failures are reported asynchronously by on_process_error
+        self.proc_panasonic = self.create_process(f"./bin/panasonic_driver{ext}", drv_args, "Panasonic Driver")
+        self.proc_sonar = self.create_process(f"./bin/sonoptix_driver{ext}", drv_args, "Sonar Driver")
 
         self.btn_start_session.setEnabled(False)
         self.btn_stop_session.setEnabled(True)
@@ -507,40 +579,37 @@ class ROVConsole(QMainWindow):
         self.btn_process.setEnabled(True)
         self.reset_processed_view()
 
-    def create_process(self, exe, args):
-        proc = QProcess()
+    def create_process(self, exe, args, name):
+        # Driver stdio and start-up are handled through QProcess signals on the event loop,
+        # nothing here blocks the UI
+        proc = QProcess(self)
+        proc.setProgram(exe)
+        proc.setArguments(args)
         proc.readyReadStandardOutput.connect(lambda: self.handle_log(proc))
         proc.readyReadStandardError.connect(lambda: self.handle_log(proc, is_err=True))
-        creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
+        proc.started.connect(lambda: self.append_log(f"[INFO] {name} started."))
+        proc.errorOccurred.connect(lambda error: self.on_process_error(proc, name, error))
 
-        try:
-            p = subprocess.Popen([exe] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE,
-                                 creationflags=creationflags, text=False)
-            t_out = threading.Thread(target=self.read_popen_output, args=(p, False))
-            t_err = threading.Thread(target=self.read_popen_output, args=(p, True))
-            t_out.daemon = True
-            t_err.daemon = True
-            t_out.start()
-            t_err.start()
-            return p
-        except Exception as e:
-            self.log_output.append(f"[ERR] Failed to start {exe}: {e}")
+        proc.start()
+        # On Windows a missing driver fails inside start() itself, before the caller has
+        # stored proc; on_process_error has already logged it and queued its deletion
+        if proc.state() == QProcess.ProcessState.NotRunning:
             return None
+        return proc
 
-    def read_popen_output(self, proc, is_err):
-        stream = proc.stderr if is_err else proc.stdout
-        prefix = "[DRV_ERR]" if is_err else "[DRV]"
-        while True:
-            line = stream.readline()
-            if not line: break
-            try:
-                decoded = line.decode('utf-8', errors='ignore').strip()
-                if decoded: print(f"{prefix} {decoded}")
-            except:
-                pass
+    def on_process_error(self, proc, name, error):
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        self.append_log(f"[WARN] {name} failed to start: {proc.errorString()}")
+        # Forget the driver so sonar commands and kill_process skip it
+        if proc is self.proc_panasonic:
+            self.proc_panasonic = None
+        if proc is self.proc_sonar:
+            self.proc_sonar = None
+        proc.deleteLater()
 
     def stop_session(self):
-        self.log_output.append(">>> SESSION STOPPING...")
+        self.append_log(">>> SESSION STOPPING...")
         if self.thread_main: self.thread_main.stop_recording()
         self.kill_process(self.proc_panasonic)
         self.kill_process(self.proc_sonar)
@@ -569,16 +638,21 @@ class ROVConsole(QMainWindow):
 
     def kill_process(self, proc):
         if not proc: return
-        if proc.poll() is None:
-            try:
-                if proc.stdin: proc.stdin.close()
-                if os.name == 'nt':
-                    proc.send_signal(signal.CTRL_BREAK_EVENT)
-                else:
-                    proc.send_signal(signal.SIGINT)
-                proc.wait(timeout=5)
-            except:
+        if proc.state() != QProcess.ProcessState.NotRunning:
+            # The drivers shut down cleanly when their stdin is closed; on POSIX
+            # SIGINT is sent as well. QProcess can't start them in their own
+            # process group, so there is no CTRL_BREAK on Windows.
+            proc.closeWriteChannel()
+            if os.name != 'nt':
+                try:
+                    os.kill(proc.processId(), signal.SIGINT)
+                except OSError:
+                    pass
+            if not proc.waitForFinished(5000):
                 proc.kill()
+                proc.waitForFinished(1000)
+        # QProcess objects are parented to the window; free them so they don't pile up across sessions
+        proc.deleteLater()
 
     def run_processing(self):
         if not self.current_session_path or not os.path.exists(self.current_session_path):
@@ -609,14 +683,14 @@ class ROVConsole(QMainWindow):
             self.btn_process.setEnabled(False)
 
         if success:
-            self.log_output.append(f">>> {msg}")
-            pix = QPixmap(output_path)
-            if not pix.isNull():
-                self.set_pixmap_scaled(self.lbl_proc, pix.toImage())
+            self.append_log(f">>> {msg}")
+            image = QImage(output_path)
+            if not image.isNull():
+                self.set_pixmap_scaled(self.lbl_proc, image)
             else:
                 self.lbl_proc.setText("Error loading processed image")
         else:
-            self.log_output.append(f"[ERR] {msg}")
+            self.append_log(f"[ERR] {msg}")
             self.lbl_proc.setText("Processing Failed")
 
     def handle_log(self, proc, is_err=False):
@@ -624,7 +698,7 @@ class ROVConsole(QMainWindow):
             data = proc.readAllStandardError() if is_err else proc.readAllStandardOutput()
             prefix = "[ERR]" if is_err else "[DRV]"
             text = bytes(data).decode("utf8", errors="ignore").strip()
-            if text: self.log_output.append(f"{prefix} {text}")
+            if text: self.append_log(f"{prefix} {text}")
         except:
             pass
 
@@ -0,0 +1,24 @@
+from PyQt6.QtCore import Qt
+
+
+class DisplayScalingMixin:
+    """
+    Lets a video thread scale its frames to the label that shows them before emitting,
+    so the UI thread only has to paint. Mix in ahead of QThread.
+    """
+    # (width, height) of the label showing this stream, set from the UI thread
+    target_size = None
+
+    def set_target_size(self, width, height):
+        self.target_size = (width, height)
+
+    def to_display_image(self, image):
+        """
+        Scales a frame to the target label size, or detaches it from the numpy
+        buffer with .copy() while no size is known yet. Either way the result owns its data.
+        """
+        target_size = self.target_size
+        if target_size is None or target_size[0] < 1 or target_size[1] < 1:
+            return image.copy()
+        return image.scaled(target_size[0], target_size[1], Qt.AspectRatioMode.KeepAspectRatio,
+                            Qt.TransformationMode.SmoothTransformation)
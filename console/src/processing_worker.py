@@ -1,5 +1,4 @@
 import os
-import glob
 import subprocess
 from PyQt6.QtCore import QThread, pyqtSignal
 
@@ -18,19 +17,26 @@ class ProcessingWorker(QThread):
             self.finished_signal.emit(False, f"Dir not found: {self.images_dir}", "")
             return
 
-        # Get list of .jpg files
-        list_of_files = glob.glob(os.path.join(self.images_dir, "*.jpg"))
-        if not list_of_files:
-            self.finished_signal.emit(False, "No images found to process", "")
-            return
-
-        # Find latest by creation time
+        # Find the latest .jpg by creation time in a single directory pass.
+        # DirEntry caches its stat (free on Windows, where it comes with the listing).
+        latest_file = None
+        latest_ctime = None
         try:
-            latest_file = max(list_of_files, key=os.path.getctime)
+            with os.scandir(self.images_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".jpg") and entry.is_file():
+                        ctime = entry.stat().st_ctime
+                        if latest_ctime is None or ctime > latest_ctime:
+                            latest_ctime = ctime
+                            latest_file = entry.path
         except Exception as e:
             self.finished_signal.emit(False, f"Error finding latest file: {e}", "")
             return
 
+        if latest_file is None:
+            self.finished_signal.emit(False, "No images found to process", "")
+            return
+
         # 2. Prepare Output Path
         filename = os.path.basename(latest_file)
         output_filename = f"processed_{filename}"
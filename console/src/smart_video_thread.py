@@ -8,8 +8,10 @@ import time
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtGui import QImage
 
+from src.display_scaling import DisplayScalingMixin
 
-class SmartVideoThread(QThread):
+
+class SmartVideoThread(DisplayScalingMixin, QThread):
     change_pixmap_signal = pyqtSignal(QImage)
     log_signal = pyqtSignal(str)
 
@@ -143,8 +145,10 @@ a=fmtp:96 packetization-mode=1;sprop-parameter-sets=Z01AKZZUA8ARPyo=,aO44gA==;pr
                 if self.video_writer.isOpened():
                     self.video_writer.write(frame)
 
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            qt_image = QImage(rgb_image.data, cam_w, cam_h, cam_w * 3, QImage.Format.Format_RGB888).copy()
+            # 32bpp BGRA is Qt's native RGB32 layout, which its scaler handles fastest
+            bgra_image = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+            qt_image = self.to_display_image(
+                QImage(bgra_image.data, cam_w, cam_h, cam_w * 4, QImage.Format.Format_RGB32))
             self.change_pixmap_signal.emit(qt_image)
             self.msleep(30)
 
@@ -179,7 +183,7 @@ a=fmtp:96 packetization-mode=1;sprop-parameter-sets=Z01AKZZUA8ARPyo=,aO44gA==;pr
         # Note: We reset codec to rawvideo for the pipe output
         cmd.extend([
             '-f', 'image2pipe',
-            '-pix_fmt', 'bgr24',
+            '-pix_fmt', 'bgra',
             '-vcodec', 'rawvideo',
             '-s', f'{self.display_width}x{self.display_height}',
             '-'
@@ -212,7 +216,8 @@ a=fmtp:96 packetization-mode=1;sprop-parameter-sets=Z01AKZZUA8ARPyo=,aO44gA==;pr
         self.error_reader_thread.daemon = True
         self.error_reader_thread.start()
 
-        frame_size = self.display_width * self.display_height * 3
+        # bgra matches QImage.Format_RGB32 byte for byte, no colour conversion needed
+        frame_size = self.display_width * self.display_height * 4
 
         # Read Loop
         while self.run_flag and not self.restart_requested:
@@ -230,12 +235,12 @@ a=fmtp:96 packetization-mode=1;sprop-parameter-sets=Z01AKZZUA8ARPyo=,aO44gA==;pr
 
                 # We don't write to disk here anymore. FFmpeg handles it.
                 # We just decode for display.
-                frame = np.frombuffer(in_bytes, np.uint8).reshape((self.display_height, self.display_width, 3))
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                frame = np.frombuffer(in_bytes, np.uint8).reshape((self.display_height, self.display_width, 4))
 
-                # .copy() is crucial to prevent crash when resizing window
-                qt_image = QImage(rgb_image.data, self.display_width, self.display_height,
-                                  self.display_width * 3, QImage.Format.Format_RGB888).copy()
+                # Scaling/copying is crucial to prevent crash when resizing window
+                qt_image = self.to_display_image(
+                    QImage(frame.data, self.display_width, self.display_height,
+                           self.display_width * 4, QImage.Format.Format_RGB32))
                 self.change_pixmap_signal.emit(qt_image)
 
             except Exception as e:
@@ -5,8 +5,10 @@ import numpy as np
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtGui import QImage
 
+from src.display_scaling import DisplayScalingMixin
 
-class VideoThreadUDP(QThread):
+
+class VideoThreadUDP(DisplayScalingMixin, QThread):
     change_pixmap_signal = pyqtSignal(QImage)
 
     def __init__(self, port, name="Unknown"):
@@ -30,12 +32,15 @@ class VideoThreadUDP(QThread):
                 np_arr = np.frombuffer(data, np.uint8)
                 frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
                 if frame is not None:
-                    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = rgb_image.shape
+                    # 32bpp BGRA is Qt's native RGB32 layout, which its scaler handles fastest
+                    bgra_image = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+                    h, w, ch = bgra_image.shape
                     bytes_per_line = ch * w
 
-                    # FIX: Added .copy() to decouple QImage from the temporary numpy array
-                    qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888).copy()
+                    # Scaled (or copied) here to decouple QImage from the temporary numpy array
+                    # and to keep the smooth rescale off the UI thread
+                    qt_image = self.to_display_image(
+                        QImage(bgra_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB32))
 
                     self.change_pixmap_signal.emit(qt_image)
             except socket.timeout: